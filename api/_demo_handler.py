@@ -0,0 +1,89 @@
+"""
+Stdlib request handler for the demo API
+
+Written in plain, statically typed Python so it compiles unchanged with Cython:
+
+    cythonize -i -3 api/_demo_handler.py
+
+A compiled extension next to this file is imported in preference to it, so the
+pure-Python version is the fallback whenever no build is present.
+"""
+
+from http.server import BaseHTTPRequestHandler
+
+PREFERRED_ENCODINGS = (b'br', b'gzip')  # server preference when q-values tie
+
+
+def parse_accept_encoding(accept_encoding: bytes) -> dict:
+    """Map each content-coding in an Accept-Encoding header to its q-value."""
+    qvalues: dict = {}
+    for part in accept_encoding.split(b','):
+        coding, _, params = part.partition(b';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q: float = 1.0
+        for param in params.split(b';'):
+            name, _, value = param.partition(b'=')
+            if name.strip().lower() == b'q':
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = q
+    return qvalues
+
+
+def negotiate(variants: dict, accept_encoding: bytes):
+    """
+    Pick the highest-q precompressed variant the client accepts.
+
+    Codings with q=0, directly or through ``*;q=0``, are never chosen; the
+    identity variant is the fallback when no compressed one is acceptable.
+    """
+    qvalues: dict = parse_accept_encoding(accept_encoding)
+    wildcard: float = qvalues.get(b'*', 0.0)
+    best = None
+    best_q: float = 0.0
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding not in variants:
+            continue
+        q: float = qvalues.get(encoding, wildcard)
+        if q > best_q:
+            best = encoding
+            best_q = q
+    return variants[best]
+
+
+class DemoRequestHandler(BaseHTTPRequestHandler):
+    """Serves prebuilt responses; subclasses fill in ``raw_routes`` and ``not_found``."""
+
+    protocol_version = 'HTTP/1.1'  # keep connections open between HTMX requests
+    wbufsize = -1  # buffered; flushed once per request by handle_one_request
+
+    # (method, path) -> {content-coding: complete response bytes}
+    raw_routes: dict = {}
+    not_found: bytes = b''
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        # Drain the (unused) form body so the kept-alive connection stays in sync
+        length: int = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str):
+        """Write the route's prebuilt response (status line, headers and body) in one go."""
+        path: str = self.path.partition('?')[0]
+        variants = self.raw_routes.get((method, path))
+        if variants is None:
+            self.wfile.write(self.not_found)
+            self.log_request(404)
+            return
+        accept_encoding: bytes = self.headers.get('Accept-Encoding', '').encode('latin-1')
+        response: bytes = negotiate(variants, accept_encoding)
+        self.wfile.write(response)
+        self.log_request(200)
@@ -0,0 +1,23 @@
+"""
+Local server bootstrap shared by the API modules
+Runs an ASGI app under uvicorn, on an io_uring event loop (uringcore) when installed
+"""
+
+import asyncio
+
+import uvicorn
+
+
+def install_event_loop():
+    """Install the io_uring loop policy if available; return uvicorn's ``loop`` setting."""
+    try:
+        import uringcore
+    except ImportError:
+        return 'auto'  # uvloop if installed, else asyncio
+    asyncio.set_event_loop_policy(uringcore.EventLoopPolicy())
+    return 'none'  # keep the policy installed above
+
+
+def serve(app, host='127.0.0.1', port=8000, **kwargs):
+    """Serve ``app`` with uvicorn (httptools parser when available)."""
+    uvicorn.run(app, host=host, port=port, loop=install_event_loop(), http='auto', **kwargs)
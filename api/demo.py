@@ -1,11 +1,26 @@
 """
 Ultra-minimal Vercel API for TFT Webapp
-Zero external dependencies - pure Python standard library
+Zero external dependencies - pure Python standard library (brotli used if installed)
+
+Two entry points share the same responses:
+- ``handler``: stdlib BaseHTTPRequestHandler (Vercel Python runtime), see _demo_handler.py
+- ``app``: bare ASGI callable, served locally by uvicorn (``python api/demo.py``)
 """
 
+import gzip
 import json
 import urllib.parse
-from http.server import BaseHTTPRequestHandler
+
+# Package import when loaded as api.demo; bare name when api/ is on sys.path (Vercel, script)
+try:
+    from ._demo_handler import DemoRequestHandler, negotiate
+except ImportError:
+    from _demo_handler import DemoRequestHandler, negotiate
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Mock data
 MOCK_STATS = {'matches': 12500, 'participants': 100000}
@@ -14,26 +29,19 @@ MOCK_CLUSTERS = [
     {"id": "1", "name": "Jinx Sniper", "size": 980, "avg_placement": 3.8, "winrate": 15.2, "top4_rate": 58.1},
 ]
 
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        path = self.path.split('?')[0]
-        
-        if path == '/api/status':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            html = '''<div class="bg-yellow-50 border border-yellow-200 rounded-lg p-4">
+
+def render_status():
+    """Demo mode status banner."""
+    return '''<div class="bg-yellow-50 border border-yellow-200 rounded-lg p-4">
                 <h3 class="text-sm font-medium text-yellow-800">Demo Mode</h3>
                 <p class="text-sm text-yellow-700">Using mock data for demonstration.</p>
             </div>'''
-            self.wfile.write(html.encode())
-            
-        elif path == '/api/stats':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            stats = MOCK_STATS
-            html = f'''<div class="bg-white p-6 rounded-lg shadow">
+
+
+def render_stats():
+    """Mock database statistics cards."""
+    stats = MOCK_STATS
+    return f'''<div class="bg-white p-6 rounded-lg shadow">
                 <h3 class="text-lg font-medium mb-2">Total Matches</h3>
                 <p class="text-3xl font-bold text-blue-600">{stats['matches']:,}</p>
             </div>
@@ -45,25 +53,17 @@ class handler(BaseHTTPRequestHandler):
                 <h3 class="text-lg font-medium mb-2">Avg Players/Match</h3>
                 <p class="text-3xl font-bold text-purple-600">{stats['participants']/stats['matches']:.1f}</p>
             </div>'''
-            self.wfile.write(html.encode())
-            
-        elif path == '/api/clusters/list':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            clusters = [{"id": c["id"], "name": c["name"]} for c in MOCK_CLUSTERS]
-            self.wfile.write(json.dumps({"clusters": clusters}).encode())
-            
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def do_POST(self):
-        if self.path == '/api/query':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            html = '''<div class="bg-white p-6 rounded-lg shadow">
+
+
+def render_clusters_list():
+    """Cluster id/name pairs for the cluster selector."""
+    clusters = [{"id": c["id"], "name": c["name"]} for c in MOCK_CLUSTERS]
+    return json.dumps({"clusters": clusters})
+
+
+def render_query():
+    """Mock query results."""
+    return '''<div class="bg-white p-6 rounded-lg shadow">
                 <h3 class="text-lg font-medium mb-4">Query Results (Demo)</h3>
                 <div class="grid grid-cols-2 md:grid-cols-4 gap-4">
                     <div class="bg-gray-50 p-4 rounded">
@@ -84,7 +84,110 @@ class handler(BaseHTTPRequestHandler):
                     </div>
                 </div>
             </div>'''
-            self.wfile.write(html.encode())
-        else:
-            self.send_response(404)
-            self.end_headers()
\ No newline at end of file
+
+
+# Every response is static, so bodies are rendered and encoded once at import
+_STATUS_HTML = render_status().encode()
+_STATS_HTML = render_stats().encode()
+_CLUSTERS_JSON = render_clusters_list().encode()
+_QUERY_HTML = render_query().encode()
+
+_HTML = b'text/html'
+_JSON = b'application/json'
+
+# Mock data only changes on redeploy, so GET responses may be cached briefly
+_CACHE_CONTROL = b'public, max-age=60'
+
+# (method, path) -> (content type, body)
+_BODIES = {
+    ('GET', '/api/status'): (_HTML, _STATUS_HTML),
+    ('GET', '/api/stats'): (_HTML, _STATS_HTML),
+    ('GET', '/api/clusters/list'): (_JSON, _CLUSTERS_JSON),
+    ('POST', '/api/query'): (_HTML, _QUERY_HTML),
+}
+
+
+def _compressed(body):
+    """Compressed variants of a body keyed by content-coding, kept only when smaller."""
+    variants = {b'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[b'br'] = brotli.compress(body, quality=11)
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+
+def _headers(method, content_type, body, encoding=None):
+    """Response headers for one route, as ASGI (name, value) byte pairs."""
+    headers = [(b'content-type', content_type), (b'content-length', b'%d' % len(body))]
+    if encoding is not None:
+        headers.append((b'content-encoding', encoding))
+    headers.append((b'vary', b'accept-encoding'))
+    if method == 'GET':
+        headers.append((b'cache-control', _CACHE_CONTROL))
+    return headers
+
+
+def _variants(method, content_type, body):
+    """content-coding (None for identity) -> (headers, body) for one route."""
+    variants = {None: (_headers(method, content_type, body), body)}
+    for encoding, data in _compressed(body).items():
+        variants[encoding] = (_headers(method, content_type, data, encoding), data)
+    return variants
+
+
+def _raw_response(headers, body):
+    """Complete keep-alive HTTP/1.1 response for the stdlib handler as a single bytes object."""
+    lines = [b'HTTP/1.1 200 OK', *(b'%s: %s' % header for header in headers), b'Connection: keep-alive', b'', body]
+    return b'\r\n'.join(lines)
+
+
+# (method, path) -> {content-coding: (headers, body)}; all variants compressed once at import
+ROUTES = {key: _variants(key[0], content_type, body) for key, (content_type, body) in _BODIES.items()}
+
+# (method, path) -> {content-coding: prebuilt response}, so each request is one write
+RAW_ROUTES = {
+    key: {encoding: _raw_response(headers, body) for encoding, (headers, body) in variants.items()}
+    for key, variants in ROUTES.items()
+}
+_RAW_NOT_FOUND = b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: keep-alive\r\n\r\n'
+
+
+async def app(scope, receive, send):
+    """ASGI entry point: one response-start and one body message per request."""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    variants = ROUTES.get((scope['method'], scope['path']))
+    if variants is None:
+        await send({'type': 'http.response.start', 'status': 404, 'headers': [(b'content-length', b'0')]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    accept_encoding = b''
+    for name, value in scope['headers']:
+        if name == b'accept-encoding':
+            accept_encoding = value
+            break
+    headers, body = negotiate(variants, accept_encoding)
+    await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+class handler(DemoRequestHandler):
+    raw_routes = RAW_ROUTES
+    not_found = _RAW_NOT_FOUND
+
+
+if __name__ == '__main__':
+    try:
+        from ._server import serve
+    except ImportError:
+        from _server import serve
+    serve(app, lifespan='on')
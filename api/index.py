@@ -1,20 +1,34 @@
 """
 Vercel API endpoints for TFT Webapp
-Provides REST API for HTMX frontend
+Provides REST API for HTMX frontend as a Starlette ASGI app
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import HTMLResponse, Response
+from starlette.routing import Route
 import os
+import ast
 import json
 import logging
+import functools
+import urllib.parse
 from typing import Dict, Any, List
 
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 # Setup logging
-logging.basicConfig(level=logging.INFO)
+# WARNING by default so request paths don't pay for INFO records; override with LOG_LEVEL
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING').upper())
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-
 # Import TFT query system
 try:
     import sys
@@ -23,7 +37,7 @@ try:
     from simple_database import SimpleTFTQuery as TFTQuery, test_connection, get_match_stats
     DATABASE_AVAILABLE = True
 except ImportError as e:
-    logger.warning(f"Database import failed: {e}")
+    logger.warning("Database import failed: %s", e)
     DATABASE_AVAILABLE = False
     
     # Fallback class
@@ -41,17 +55,293 @@ except ImportError as e:
     def get_match_stats():
         return {'matches': 0, 'participants': 0}
 
-@app.route('/')
-def index():
-    """Serve the main HTML page"""
-    with open('index.html', 'r') as f:
-        return f.read()
+INDEX_HTML_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'index.html')
 
-@app.route('/api/status')
-def get_status():
-    """Get database connection status"""
-    if not DATABASE_AVAILABLE:
-        return """
+FALLBACK_INDEX_HTML = b"""
+<!DOCTYPE html>
+<html>
+<head><title>TFT Webapp</title></head>
+<body>
+<h1>TFT Webapp</h1>
+<p>index.html was not found alongside the API.</p>
+<p><a href="/api/status">Check API Status</a></p>
+</body>
+</html>
+"""
+
+def _load_index_html():
+    """Read the frontend page, or the fallback if it is not deployed."""
+    try:
+        with open(INDEX_HTML_PATH, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return FALLBACK_INDEX_HTML
+
+# Loaded once at import instead of on every request
+_INDEX_HTML = _load_index_html()
+
+# Mock cluster list - in production this would query the database
+MOCK_CLUSTERS = [
+    {"id": "0", "name": "Aphelios Carry"},
+    {"id": "1", "name": "Jinx Sniper"},
+    {"id": "2", "name": "Star Guardian"},
+    {"id": "3", "name": "Vanguard Tank"},
+    {"id": "4", "name": "Battle Academia"},
+]
+
+# Static, so serialized once at import
+_CLUSTERS_LIST_JSON = dumps({"clusters": MOCK_CLUSTERS})
+
+# Mock cluster details - in production this would query the database
+MOCK_CLUSTER_DETAILS = {
+    "0": {
+        "name": "Aphelios Carry",
+        "size": 1250,
+        "avg_placement": 3.2,
+        "winrate": 18.5,
+        "top4_rate": 62.4,
+        "carries": ["Aphelios", "Jinx"],
+        "traits": ["Sniper", "Star_Guardian"]
+    },
+    "1": {
+        "name": "Jinx Sniper", 
+        "size": 980,
+        "avg_placement": 3.8,
+        "winrate": 15.2,
+        "top4_rate": 58.1,
+        "carries": ["Jinx", "Kai'Sa"],
+        "traits": ["Sniper", "Battle_Academia"]
+    }
+}
+
+def _default_cluster_details(cluster_id):
+    """Placeholder details for clusters without mock data."""
+    return {
+        "name": f"Cluster {cluster_id}",
+        "size": 500,
+        "avg_placement": 4.0,
+        "winrate": 12.5,
+        "top4_rate": 50.0,
+        "carries": ["Unknown"],
+        "traits": ["Unknown"]
+    }
+
+# Badge markup split around the variable unit/trait name
+_CARRY_BADGE_PREFIX = b'<span class="px-2 py-1 bg-blue-100 text-blue-800 rounded text-sm">'
+_TRAIT_BADGE_PREFIX = b'<span class="px-2 py-1 bg-green-100 text-green-800 rounded text-sm">'
+_BADGE_SUFFIX = b'</span>'
+
+_CARRIES_OPEN = b"""<div class="space-y-4">
+        <div>
+            <h4 class="font-medium text-gray-700 mb-2">Carry Units</h4>
+            <div class="flex flex-wrap gap-2">
+                """
+_TRAITS_OPEN = b"""
+            </div>
+        </div>
+        <div>
+            <h4 class="font-medium text-gray-700 mb-2">Common Traits</h4>
+            <div class="flex flex-wrap gap-2">
+                """
+_DETAILS_CLOSE = b"""
+            </div>
+        </div>
+    </div>
+    """
+
+def _render_badges(prefix, names):
+    """Space-separated badge spans for a list of names."""
+    return b' '.join(b''.join((prefix, name.encode(), _BADGE_SUFFIX)) for name in names)
+
+def _render_cluster_details(cluster_id, details):
+    """Render the details panel for one cluster as bytes."""
+    return b''.join((
+        f"""
+    <h3 class="text-xl font-semibold mb-4">Cluster {cluster_id}: {details['name']}</h3>
+    
+    <div class="grid grid-cols-2 md:grid-cols-4 gap-4 mb-6">
+        <div class="bg-gray-50 p-4 rounded">
+            <h4 class="text-sm font-medium text-gray-600">Compositions</h4>
+            <p class="text-2xl font-bold">{details['size']:,}</p>
+        </div>
+        <div class="bg-gray-50 p-4 rounded">
+            <h4 class="text-sm font-medium text-gray-600">Avg Placement</h4>
+            <p class="text-2xl font-bold">{details['avg_placement']}</p>
+        </div>
+        <div class="bg-gray-50 p-4 rounded">
+            <h4 class="text-sm font-medium text-gray-600">Win Rate</h4>
+            <p class="text-2xl font-bold">{details['winrate']}%</p>
+        </div>
+        <div class="bg-gray-50 p-4 rounded">
+            <h4 class="text-sm font-medium text-gray-600">Top 4 Rate</h4>
+            <p class="text-2xl font-bold">{details['top4_rate']}%</p>
+        </div>
+    </div>
+    
+    """.encode(),
+        _CARRIES_OPEN,
+        _render_badges(_CARRY_BADGE_PREFIX, details['carries']),
+        _TRAITS_OPEN,
+        _render_badges(_TRAIT_BADGE_PREFIX, details['traits']),
+        _DETAILS_CLOSE,
+    ))
+
+# cluster id -> fully rendered details panel for the literal mock clusters
+_CLUSTER_DETAILS_HTML = {
+    cluster_id: _render_cluster_details(cluster_id, details)
+    for cluster_id, details in MOCK_CLUSTER_DETAILS.items()
+}
+
+# Query methods a query string may call; add_custom_filter takes raw SQL so it is left out
+_QUERY_ROOTS = frozenset({'TFTQuery', 'SimpleTFTQuery'})
+_QUERY_METHODS = frozenset({
+    'add_unit', 'add_trait', 'add_player_level', 'add_unit_count', 'add_item_on_unit',
+    'add_last_round', 'add_unit_star_level', 'add_unit_item_count', 'add_augment',
+    'set_patch', 'set_sub_cluster', 'set_main_cluster', 'set_cluster',
+    'or_', 'not_', 'xor', 'get_stats', 'execute',
+})
+
+class _SubQuery(tuple):
+    """Parsed call chain passed as an argument, e.g. to or_()."""
+
+def _parse_arg(node):
+    """Literal argument, or a nested TFTQuery() chain."""
+    if isinstance(node, ast.Call):
+        return _SubQuery(_parse_call_chain(node))
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise ValueError("Query arguments must be literals or TFTQuery() chains")
+
+def _parse_call_chain(node):
+    """Flatten TFTQuery().a(...).b(...) into ((method, args, kwargs), ...)."""
+    calls = []
+    while isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+        method = node.func.attr
+        if method not in _QUERY_METHODS:
+            raise ValueError(f"Unsupported query method: {method}")
+        if any(kw.arg is None for kw in node.keywords):
+            raise ValueError("Keyword unpacking is not supported in queries")
+        args = tuple(_parse_arg(arg) for arg in node.args)
+        kwargs = tuple((kw.arg, _parse_arg(kw.value)) for kw in node.keywords)
+        calls.append((method, args, kwargs))
+        node = node.func.value
+    
+    if isinstance(node, ast.Attribute):
+        raise ValueError(f"Unsupported query method: {node.attr}")
+    if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in _QUERY_ROOTS and not node.args and not node.keywords):
+        raise ValueError("Query must start with TFTQuery() or SimpleTFTQuery()")
+    
+    calls.reverse()
+    return tuple(calls)
+
+@functools.lru_cache(maxsize=1024)
+def _parse_query(query_text):
+    """Parse a query string once; repeated queries hit the cache."""
+    return _parse_call_chain(ast.parse(query_text, mode='eval').body)
+
+def _resolve_arg(value):
+    return _run_query(value) if isinstance(value, _SubQuery) else value
+
+def _run_query(chain):
+    """Replay a parsed call chain against a fresh TFTQuery."""
+    result = TFTQuery()
+    for method, args, kwargs in chain:
+        result = getattr(result, method)(
+            *[_resolve_arg(arg) for arg in args],
+            **{name: _resolve_arg(value) for name, value in kwargs}
+        )
+    return result
+
+@functools.lru_cache(maxsize=512)
+def _render_stats_html(play_count, avg_placement, winrate, top4_rate):
+    """Stats card for a query result; most queries repeat a handful of stat tuples."""
+    return f"""
+    <div class="bg-white p-6 rounded-lg shadow">
+        <h3 class="text-lg font-medium mb-4">Query Results</h3>
+        <div class="grid grid-cols-2 md:grid-cols-4 gap-4">
+            <div class="bg-gray-50 p-4 rounded">
+                <h4 class="text-sm font-medium text-gray-600">Play Count</h4>
+                <p class="text-2xl font-bold">{play_count:,}</p>
+            </div>
+            <div class="bg-gray-50 p-4 rounded">
+                <h4 class="text-sm font-medium text-gray-600">Avg Placement</h4>
+                <p class="text-2xl font-bold">{avg_placement}</p>
+            </div>
+            <div class="bg-gray-50 p-4 rounded">
+                <h4 class="text-sm font-medium text-gray-600">Win Rate</h4>
+                <p class="text-2xl font-bold">{winrate}%</p>
+            </div>
+            <div class="bg-gray-50 p-4 rounded">
+                <h4 class="text-sm font-medium text-gray-600">Top 4 Rate</h4>
+                <p class="text-2xl font-bold">{top4_rate}%</p>
+            </div>
+        </div>
+    </div>
+    """.encode()
+
+def _participant_row(p):
+    """Hashable (placement, level, last_round, unit ids, truncated) for one participant."""
+    units = p.get('units', [])
+    return (
+        p.get('placement', 'N/A'),
+        p.get('level', 'N/A'),
+        p.get('last_round', 'N/A'),
+        tuple(u.get('character_id', 'Unknown') for u in units[:5]),
+        len(units) > 5,
+    )
+
+@functools.lru_cache(maxsize=512)
+def _render_participants_html(total, rows):
+    """Participant table for a query result, keyed on the displayed rows."""
+    html = f"""
+    <div class="bg-white p-6 rounded-lg shadow">
+        <h3 class="text-lg font-medium mb-4">Query Results</h3>
+        <p class="text-gray-600 mb-4">Found {total:,} matching compositions</p>
+        
+        <div class="overflow-x-auto">
+            <table class="min-w-full divide-y divide-gray-200">
+                <thead class="bg-gray-50">
+                    <tr>
+                        <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Placement</th>
+                        <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Level</th>
+                        <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Last Round</th>
+                        <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Units</th>
+                    </tr>
+                </thead>
+                <tbody class="bg-white divide-y divide-gray-200">
+    """
+    
+    for placement, level, last_round, unit_ids, truncated in rows:
+        units = ', '.join(unit_ids)
+        if truncated:
+            units += '...'
+        
+        html += f"""
+        <tr>
+            <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{placement}</td>
+            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{level}</td>
+            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{last_round}</td>
+            <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{units}</td>
+        </tr>
+        """
+    
+    html += """
+                </tbody>
+            </table>
+        </div>
+    </div>
+    """
+    
+    return html.encode()
+
+# Constant branches share one prebuilt Response each; Starlette renders body and
+# headers at construction and never mutates them, so instances are safe to reuse
+_CLUSTERS_LIST_RESP = Response(_CLUSTERS_LIST_JSON, media_type='application/json')
+_INDEX_RESP = HTMLResponse(_INDEX_HTML)
+_SELECT_CLUSTER_RESP = HTMLResponse('<p class="text-gray-500">Select a cluster to view details</p>')
+_DB_UNAVAILABLE_RESP = HTMLResponse("""
         <div class="bg-red-50 border border-red-200 rounded-lg p-4">
             <div class="flex">
                 <div class="flex-shrink-0">
@@ -63,12 +353,8 @@ def get_status():
                 </div>
             </div>
         </div>
-        """
-    
-    connection_ok = test_connection()
-    
-    if connection_ok:
-        return """
+        """)
+_DB_CONNECTED_RESP = HTMLResponse("""
         <div class="bg-green-50 border border-green-200 rounded-lg p-4">
             <div class="flex">
                 <div class="flex-shrink-0">
@@ -80,9 +366,8 @@ def get_status():
                 </div>
             </div>
         </div>
-        """
-    else:
-        return """
+        """)
+_DB_CONNECTION_FAILED_RESP = HTMLResponse("""
         <div class="bg-red-50 border border-red-200 rounded-lg p-4">
             <div class="flex">
                 <div class="flex-shrink-0">
@@ -94,10 +379,58 @@ def get_status():
                 </div>
             </div>
         </div>
-        """
+        """)
+_STATS_ERROR_RESP = HTMLResponse("""
+        <div class="bg-white p-6 rounded-lg shadow">
+            <h3 class="text-lg font-medium mb-2 text-red-600">Error</h3>
+            <p class="text-sm text-red-500">Unable to load statistics</p>
+        </div>
+        """)
+_EMPTY_QUERY_RESP = HTMLResponse("""
+        <div class="bg-yellow-50 border border-yellow-200 rounded-lg p-4">
+            <p class="text-yellow-800">Please enter a query</p>
+        </div>
+        """)
+_INVALID_QUERY_RESP = HTMLResponse("""
+            <div class="bg-red-50 border border-red-200 rounded-lg p-4">
+                <p class="text-red-800">Query must start with TFTQuery() or SimpleTFTQuery()</p>
+            </div>
+            """)
+_UPLOAD_RESP = HTMLResponse("""
+    <div class="bg-yellow-50 border border-yellow-200 rounded-lg p-4">
+        <h3 class="font-medium text-yellow-800">Upload Feature</h3>
+        <p class="text-yellow-700">File upload functionality requires database connection and is not implemented in this demo version.</p>
+    </div>
+    """)
+_DB_STATUS_ERROR_RESP = HTMLResponse("""
+        <div class="text-red-500">
+            <p>Database connection unavailable</p>
+        </div>
+        """)
+
+async def _form_value(request, name):
+    """Read one field from a urlencoded form body (what HTMX posts by default)."""
+    form = urllib.parse.parse_qs((await request.body()).decode())
+    return form.get(name, [''])[0].strip()
+
+async def index(request):
+    """Serve the main HTML page"""
+    # Re-read in debug mode so edits to index.html show up without a restart
+    return HTMLResponse(_load_index_html()) if app.debug else _INDEX_RESP
+
+def get_status(request):
+    """Get database connection status"""
+    if not DATABASE_AVAILABLE:
+        return _DB_UNAVAILABLE_RESP
+    
+    connection_ok = test_connection()
+    
+    if connection_ok:
+        return _DB_CONNECTED_RESP
+    else:
+        return _DB_CONNECTION_FAILED_RESP
 
-@app.route('/api/stats')
-def get_stats():
+def get_stats(request):
     """Get database statistics"""
     try:
         stats = get_match_stats()
@@ -117,252 +450,89 @@ def get_stats():
         </div>
         """
         
-        return html
+        return HTMLResponse(html)
         
     except Exception as e:
-        logger.error(f"Stats error: {e}")
-        return """
-        <div class="bg-white p-6 rounded-lg shadow">
-            <h3 class="text-lg font-medium mb-2 text-red-600">Error</h3>
-            <p class="text-sm text-red-500">Unable to load statistics</p>
-        </div>
-        """
+        logger.error("Stats error: %s", e)
+        return _STATS_ERROR_RESP
 
-@app.route('/api/clusters/list')
-def get_clusters_list():
+async def get_clusters_list(request):
     """Get list of available clusters"""
-    try:
-        # Mock data for now - in production this would query the database
-        clusters = [
-            {"id": "0", "name": "Aphelios Carry"},
-            {"id": "1", "name": "Jinx Sniper"},
-            {"id": "2", "name": "Star Guardian"},
-            {"id": "3", "name": "Vanguard Tank"},
-            {"id": "4", "name": "Battle Academia"},
-        ]
-        
-        return jsonify({"clusters": clusters})
-        
-    except Exception as e:
-        logger.error(f"Clusters list error: {e}")
-        return jsonify({"error": str(e)}), 500
+    return _CLUSTERS_LIST_RESP
 
-@app.route('/api/clusters/details')
-def get_cluster_details():
+async def get_cluster_details(request):
     """Get details for a specific cluster"""
-    cluster_id = request.args.get('cluster-select')
+    cluster_id = request.query_params.get('cluster-select')
     
     if not cluster_id:
-        return '<p class="text-gray-500">Select a cluster to view details</p>'
+        return _SELECT_CLUSTER_RESP
+    
+    html = _CLUSTER_DETAILS_HTML.get(cluster_id)
+    if html is not None:
+        return HTMLResponse(html)
     
     try:
-        # Mock cluster details - in production this would query the database
-        details = {
-            "0": {
-                "name": "Aphelios Carry",
-                "size": 1250,
-                "avg_placement": 3.2,
-                "winrate": 18.5,
-                "top4_rate": 62.4,
-                "carries": ["Aphelios", "Jinx"],
-                "traits": ["Sniper", "Star_Guardian"]
-            },
-            "1": {
-                "name": "Jinx Sniper", 
-                "size": 980,
-                "avg_placement": 3.8,
-                "winrate": 15.2,
-                "top4_rate": 58.1,
-                "carries": ["Jinx", "Kai'Sa"],
-                "traits": ["Sniper", "Battle_Academia"]
-            }
-        }.get(cluster_id, {
-            "name": f"Cluster {cluster_id}",
-            "size": 500,
-            "avg_placement": 4.0,
-            "winrate": 12.5,
-            "top4_rate": 50.0,
-            "carries": ["Unknown"],
-            "traits": ["Unknown"]
-        })
-        
-        html = f"""
-        <h3 class="text-xl font-semibold mb-4">Cluster {cluster_id}: {details['name']}</h3>
-        
-        <div class="grid grid-cols-2 md:grid-cols-4 gap-4 mb-6">
-            <div class="bg-gray-50 p-4 rounded">
-                <h4 class="text-sm font-medium text-gray-600">Compositions</h4>
-                <p class="text-2xl font-bold">{details['size']:,}</p>
-            </div>
-            <div class="bg-gray-50 p-4 rounded">
-                <h4 class="text-sm font-medium text-gray-600">Avg Placement</h4>
-                <p class="text-2xl font-bold">{details['avg_placement']}</p>
-            </div>
-            <div class="bg-gray-50 p-4 rounded">
-                <h4 class="text-sm font-medium text-gray-600">Win Rate</h4>
-                <p class="text-2xl font-bold">{details['winrate']}%</p>
-            </div>
-            <div class="bg-gray-50 p-4 rounded">
-                <h4 class="text-sm font-medium text-gray-600">Top 4 Rate</h4>
-                <p class="text-2xl font-bold">{details['top4_rate']}%</p>
-            </div>
-        </div>
-        
-        <div class="space-y-4">
-            <div>
-                <h4 class="font-medium text-gray-700 mb-2">Carry Units</h4>
-                <div class="flex flex-wrap gap-2">
-                    {' '.join([f'<span class="px-2 py-1 bg-blue-100 text-blue-800 rounded text-sm">{carry}</span>' for carry in details['carries']])}
-                </div>
-            </div>
-            <div>
-                <h4 class="font-medium text-gray-700 mb-2">Common Traits</h4>
-                <div class="flex flex-wrap gap-2">
-                    {' '.join([f'<span class="px-2 py-1 bg-green-100 text-green-800 rounded text-sm">{trait}</span>' for trait in details['traits']])}
-                </div>
-            </div>
-        </div>
-        """
-        
-        return html
+        return HTMLResponse(_render_cluster_details(cluster_id, _default_cluster_details(cluster_id)))
         
     except Exception as e:
-        logger.error(f"Cluster details error: {e}")
-        return f'<p class="text-red-500">Error loading cluster details: {str(e)}</p>'
+        logger.error("Cluster details error: %s", e)
+        return HTMLResponse(f'<p class="text-red-500">Error loading cluster details: {str(e)}</p>')
 
-@app.route('/api/query', methods=['POST'])
-def execute_query():
+async def execute_query(request):
     """Execute a TFT query"""
-    query_text = request.form.get('query', '').strip()
+    query_text = await _form_value(request, 'query')
     
     if not query_text:
-        return """
-        <div class="bg-yellow-50 border border-yellow-200 rounded-lg p-4">
-            <p class="text-yellow-800">Please enter a query</p>
-        </div>
-        """
+        return _EMPTY_QUERY_RESP
     
     try:
         # Validate and execute query
         if not query_text.startswith('TFTQuery()') and not query_text.startswith('SimpleTFTQuery()'):
-            return """
-            <div class="bg-red-50 border border-red-200 rounded-lg p-4">
-                <p class="text-red-800">Query must start with TFTQuery() or SimpleTFTQuery()</p>
-            </div>
-            """
+            return _INVALID_QUERY_RESP
         
-        # Replace with correct class name
-        safe_query = query_text.replace('SimpleTFTQuery()', 'TFTQuery()').replace('TFTQuery()', 'TFTQuery()')
-        
-        # Execute in safe environment
-        local_vars = {'TFTQuery': TFTQuery}
-        result = eval(safe_query, {"__builtins__": {}}, local_vars)
+        # Parse into a whitelisted method chain (cached) and replay it; nothing is eval'd
+        result = await run_in_threadpool(_run_query, _parse_query(query_text))
         
         if isinstance(result, dict):
             if "error" in result:
-                return f"""
+                return HTMLResponse(f"""
                 <div class="bg-red-50 border border-red-200 rounded-lg p-4">
                     <h3 class="font-medium text-red-800">Query Error</h3>
                     <p class="text-red-700">{result['error']}</p>
                 </div>
-                """
+                """)
             else:
-                # Display stats result
-                html = f"""
-                <div class="bg-white p-6 rounded-lg shadow">
-                    <h3 class="text-lg font-medium mb-4">Query Results</h3>
-                    <div class="grid grid-cols-2 md:grid-cols-4 gap-4">
-                        <div class="bg-gray-50 p-4 rounded">
-                            <h4 class="text-sm font-medium text-gray-600">Play Count</h4>
-                            <p class="text-2xl font-bold">{result.get('play_count', 0):,}</p>
-                        </div>
-                        <div class="bg-gray-50 p-4 rounded">
-                            <h4 class="text-sm font-medium text-gray-600">Avg Placement</h4>
-                            <p class="text-2xl font-bold">{result.get('avg_placement', 0)}</p>
-                        </div>
-                        <div class="bg-gray-50 p-4 rounded">
-                            <h4 class="text-sm font-medium text-gray-600">Win Rate</h4>
-                            <p class="text-2xl font-bold">{result.get('winrate', 0)}%</p>
-                        </div>
-                        <div class="bg-gray-50 p-4 rounded">
-                            <h4 class="text-sm font-medium text-gray-600">Top 4 Rate</h4>
-                            <p class="text-2xl font-bold">{result.get('top4_rate', 0)}%</p>
-                        </div>
-                    </div>
-                </div>
-                """
-                return html
+                return HTMLResponse(_render_stats_html(
+                    result.get('play_count', 0), result.get('avg_placement', 0),
+                    result.get('winrate', 0), result.get('top4_rate', 0)
+                ))
         elif isinstance(result, list):
-            # Display participant results
-            html = f"""
-            <div class="bg-white p-6 rounded-lg shadow">
-                <h3 class="text-lg font-medium mb-4">Query Results</h3>
-                <p class="text-gray-600 mb-4">Found {len(result):,} matching compositions</p>
-                
-                <div class="overflow-x-auto">
-                    <table class="min-w-full divide-y divide-gray-200">
-                        <thead class="bg-gray-50">
-                            <tr>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Placement</th>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Level</th>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Last Round</th>
-                                <th class="px-6 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Units</th>
-                            </tr>
-                        </thead>
-                        <tbody class="bg-white divide-y divide-gray-200">
-            """
-            
-            for i, p in enumerate(result[:20]):  # Limit to 20 results
-                units = ', '.join([u.get('character_id', 'Unknown') for u in p.get('units', [])[:5]])
-                if len(p.get('units', [])) > 5:
-                    units += '...'
-                
-                html += f"""
-                <tr>
-                    <td class="px-6 py-4 whitespace-nowrap text-sm font-medium text-gray-900">{p.get('placement', 'N/A')}</td>
-                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{p.get('level', 'N/A')}</td>
-                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{p.get('last_round', 'N/A')}</td>
-                    <td class="px-6 py-4 whitespace-nowrap text-sm text-gray-500">{units}</td>
-                </tr>
-                """
-            
-            html += """
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-            """
-            
-            return html
+            # Display participant results (limit to 20)
+            rows = tuple(_participant_row(p) for p in result[:20])
+            return HTMLResponse(_render_participants_html(len(result), rows))
         else:
-            return f"""
+            return HTMLResponse(f"""
             <div class="bg-blue-50 border border-blue-200 rounded-lg p-4">
                 <h3 class="font-medium text-blue-800">Query Result</h3>
                 <pre class="text-blue-700 mt-2">{str(result)}</pre>
             </div>
-            """
+            """)
             
     except Exception as e:
-        logger.error(f"Query execution error: {e}")
-        return f"""
+        # Tracebacks only when debugging; user query errors are expected
+        logger.error("Query execution error: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return HTMLResponse(f"""
         <div class="bg-red-50 border border-red-200 rounded-lg p-4">
             <h3 class="font-medium text-red-800">Query Error</h3>
             <p class="text-red-700">{str(e)}</p>
         </div>
-        """
+        """)
 
-@app.route('/api/upload', methods=['POST'])
-def upload_data():
+async def upload_data(request):
     """Handle data upload"""
-    return """
-    <div class="bg-yellow-50 border border-yellow-200 rounded-lg p-4">
-        <h3 class="font-medium text-yellow-800">Upload Feature</h3>
-        <p class="text-yellow-700">File upload functionality requires database connection and is not implemented in this demo version.</p>
-    </div>
-    """
+    return _UPLOAD_RESP
 
-@app.route('/api/db-status')
-def get_db_status():
+def get_db_status(request):
     """Get database status for upload tab"""
     try:
         stats = get_match_stats()
@@ -381,18 +551,27 @@ def get_db_status():
         <p class="text-sm text-gray-600 mt-4">Connected to TFT match database</p>
         """
         
-        return html
+        return HTMLResponse(html)
         
     except Exception as e:
-        return """
-        <div class="text-red-500">
-            <p>Database connection unavailable</p>
-        </div>
-        """
+        return _DB_STATUS_ERROR_RESP
 
-# Vercel serverless function handler
-def handler(request):
-    return app(request.environ, lambda status, headers: None)
+# Plain def endpoints (database-backed) run in Starlette's threadpool; async ones stay on the loop
+app = Starlette(routes=[
+    Route('/', index),
+    Route('/api/status', get_status),
+    Route('/api/stats', get_stats),
+    Route('/api/clusters/list', get_clusters_list),
+    Route('/api/clusters/details', get_cluster_details),
+    Route('/api/query', execute_query, methods=['POST']),
+    Route('/api/upload', upload_data, methods=['POST']),
+    Route('/api/db-status', get_db_status),
+])
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    try:
+        from ._server import serve
+    except ImportError:
+        from _server import serve
+    app.debug = True
+    serve(app)
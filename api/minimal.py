@@ -3,10 +3,20 @@ Minimal Vercel API for TFT Webapp Demo
 No database dependencies - uses mock data for demonstration
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request
+import os
 import json
 import logging
 
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,14 +37,11 @@ MOCK_CLUSTERS = [
     {"id": "4", "name": "Battle Academia", "size": 650, "avg_placement": 4.5, "winrate": 10.2, "top4_rate": 48.9},
 ]
 
-@app.route('/')
-def index():
-    """Serve the main HTML page"""
-    try:
-        with open('index.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return """
+_CLUSTERS_BY_ID = {c["id"]: c for c in MOCK_CLUSTERS}
+
+INDEX_HTML_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'index.html')
+
+FALLBACK_INDEX_HTML = b"""
         <!DOCTYPE html>
         <html>
         <head><title>TFT Webapp</title></head>
@@ -46,10 +53,20 @@ def index():
         </html>
         """
 
-@app.route('/api/status')
-def get_status():
-    """Get database connection status"""
-    return """
+
+def _load_index_html():
+    """Read the frontend page, or the fallback if it is not deployed."""
+    try:
+        with open(INDEX_HTML_PATH, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return FALLBACK_INDEX_HTML
+
+
+_INDEX_HTML = _load_index_html()
+
+# Mock responses never change, so render and encode them once at import
+_STATUS_HTML = """
     <div class="bg-yellow-50 border border-yellow-200 rounded-lg p-4">
         <div class="flex">
             <div class="flex-shrink-0">
@@ -61,55 +78,54 @@ def get_status():
             </div>
         </div>
     </div>
-    """
+    """.encode()
 
-@app.route('/api/stats')
-def get_stats():
-    """Get database statistics"""
-    stats = MOCK_STATS
-    
-    html = f"""
+_STATS_HTML = f"""
     <div class="bg-white p-6 rounded-lg shadow">
         <h3 class="text-lg font-medium mb-2">Total Matches</h3>
-        <p class="text-3xl font-bold text-blue-600">{stats['matches']:,}</p>
+        <p class="text-3xl font-bold text-blue-600">{MOCK_STATS['matches']:,}</p>
         <p class="text-sm text-gray-500">Demo data</p>
     </div>
     <div class="bg-white p-6 rounded-lg shadow">
         <h3 class="text-lg font-medium mb-2">Total Participants</h3>
-        <p class="text-3xl font-bold text-green-600">{stats['participants']:,}</p>
+        <p class="text-3xl font-bold text-green-600">{MOCK_STATS['participants']:,}</p>
         <p class="text-sm text-gray-500">Demo data</p>
     </div>
     <div class="bg-white p-6 rounded-lg shadow">
         <h3 class="text-lg font-medium mb-2">Avg Players/Match</h3>
-        <p class="text-3xl font-bold text-purple-600">{(stats['participants'] / stats['matches']):.1f}</p>
+        <p class="text-3xl font-bold text-purple-600">{(MOCK_STATS['participants'] / MOCK_STATS['matches']):.1f}</p>
         <p class="text-sm text-gray-500">Demo data</p>
     </div>
-    """
-    
-    return html
+    """.encode()
 
-@app.route('/api/clusters/list')
-def get_clusters_list():
-    """Get list of available clusters"""
-    clusters = [{"id": c["id"], "name": c["name"]} for c in MOCK_CLUSTERS]
-    return jsonify({"clusters": clusters})
+_CLUSTERS_LIST_JSON = dumps({"clusters": [{"id": c["id"], "name": c["name"]} for c in MOCK_CLUSTERS]})
 
-@app.route('/api/clusters/details')
-def get_cluster_details():
-    """Get details for a specific cluster"""
-    cluster_id = request.args.get('cluster-select')
-    
-    if not cluster_id:
-        return '<p class="text-gray-500">Select a cluster to view details</p>'
-    
-    # Find cluster data
-    cluster_data = next((c for c in MOCK_CLUSTERS if c["id"] == cluster_id), None)
-    
-    if not cluster_data:
-        return f'<p class="text-red-500">Cluster {cluster_id} not found</p>'
-    
-    html = f"""
-    <h3 class="text-xl font-semibold mb-4">Cluster {cluster_id}: {cluster_data['name']}</h3>
+_UPLOAD_HTML = """
+    <div class="bg-blue-50 border border-blue-200 rounded-lg p-4">
+        <h3 class="font-medium text-blue-800">Demo Mode</h3>
+        <p class="text-blue-700">File upload requires database connection. This is a demonstration version.</p>
+    </div>
+    """.encode()
+
+_DB_STATUS_HTML = f"""
+    <div class="grid grid-cols-2 gap-4">
+        <div class="bg-gray-50 p-4 rounded">
+            <h4 class="text-sm font-medium text-gray-600">Total Matches</h4>
+            <p class="text-2xl font-bold">{MOCK_STATS['matches']:,}</p>
+        </div>
+        <div class="bg-gray-50 p-4 rounded">
+            <h4 class="text-sm font-medium text-gray-600">Total Participants</h4>
+            <p class="text-2xl font-bold">{MOCK_STATS['participants']:,}</p>
+        </div>
+    </div>
+    <p class="text-sm text-yellow-600 mt-4">⚠️ Demo mode - using mock data</p>
+    """.encode()
+
+
+def _render_cluster_details(cluster_data):
+    """Render the details panel for one mock cluster."""
+    return f"""
+    <h3 class="text-xl font-semibold mb-4">Cluster {cluster_data['id']}: {cluster_data['name']}</h3>
     
     <div class="grid grid-cols-2 md:grid-cols-4 gap-4 mb-6">
         <div class="bg-gray-50 p-4 rounded">
@@ -134,6 +150,68 @@ def get_cluster_details():
         <p class="text-yellow-800 text-sm">📊 Demo data - Connect your database for real cluster analysis</p>
     </div>
     """
+
+
+# cluster id -> fully rendered details panel
+_CLUSTER_DETAILS_HTML = {
+    cluster_id: _render_cluster_details(cluster_data).encode()
+    for cluster_id, cluster_data in _CLUSTERS_BY_ID.items()
+}
+
+
+# Prebuilt header lists for the cached bodies; Flask builds a fresh Response per
+# request from (body, status, headers), so nothing mutable is shared between requests
+_HTML_HEADERS = (('Content-Type', 'text/html; charset=utf-8'),)
+_JSON_HEADERS = (('Content-Type', 'application/json'),)
+
+
+# Routes serving mock data, which only changes on redeploy
+_CACHEABLE_PATHS = frozenset({
+    '/', '/api/status', '/api/stats', '/api/clusters/list',
+    '/api/clusters/details', '/api/db-status',
+})
+
+@app.after_request
+def add_cache_headers(response):
+    """Let successful GETs of the mock routes be cached briefly; errors never are"""
+    if (request.method == 'GET' and response.status_code == 200
+            and request.path in _CACHEABLE_PATHS):
+        response.headers.setdefault('Cache-Control', 'public, max-age=60')
+    return response
+
+@app.route('/')
+def index():
+    """Serve the main HTML page"""
+    # Re-read in debug mode so edits to index.html show up without a restart
+    return _load_index_html() if app.debug else _INDEX_HTML
+
+@app.route('/api/status')
+def get_status():
+    """Get database connection status"""
+    return _STATUS_HTML, 200, _HTML_HEADERS
+
+@app.route('/api/stats')
+def get_stats():
+    """Get database statistics"""
+    return _STATS_HTML, 200, _HTML_HEADERS
+
+@app.route('/api/clusters/list')
+def get_clusters_list():
+    """Get list of available clusters"""
+    return _CLUSTERS_LIST_JSON, 200, _JSON_HEADERS
+
+@app.route('/api/clusters/details')
+def get_cluster_details():
+    """Get details for a specific cluster"""
+    cluster_id = request.args.get('cluster-select')
+    
+    if not cluster_id:
+        return '<p class="text-gray-500">Select a cluster to view details</p>'
+    
+    html = _CLUSTER_DETAILS_HTML.get(cluster_id)
+    
+    if html is None:
+        return f'<p class="text-red-500">Cluster {cluster_id} not found</p>'
     
     return html
 
@@ -190,33 +268,12 @@ def execute_query():
 @app.route('/api/upload', methods=['POST'])
 def upload_data():
     """Handle data upload"""
-    return """
-    <div class="bg-blue-50 border border-blue-200 rounded-lg p-4">
-        <h3 class="font-medium text-blue-800">Demo Mode</h3>
-        <p class="text-blue-700">File upload requires database connection. This is a demonstration version.</p>
-    </div>
-    """
+    return _UPLOAD_HTML, 200, _HTML_HEADERS
 
 @app.route('/api/db-status')
 def get_db_status():
     """Get database status for upload tab"""
-    stats = MOCK_STATS
-    
-    html = f"""
-    <div class="grid grid-cols-2 gap-4">
-        <div class="bg-gray-50 p-4 rounded">
-            <h4 class="text-sm font-medium text-gray-600">Total Matches</h4>
-            <p class="text-2xl font-bold">{stats['matches']:,}</p>
-        </div>
-        <div class="bg-gray-50 p-4 rounded">
-            <h4 class="text-sm font-medium text-gray-600">Total Participants</h4>
-            <p class="text-2xl font-bold">{stats['participants']:,}</p>
-        </div>
-    </div>
-    <p class="text-sm text-yellow-600 mt-4">⚠️ Demo mode - using mock data</p>
-    """
-    
-    return html
+    return _DB_STATUS_HTML, 200, _HTML_HEADERS
 
 # Vercel serverless function handler
 def handler(request):
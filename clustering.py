@@ -24,11 +24,13 @@ TOP_UNITS_COUNT = 8               # Number of top units to display
 
 import json
 import csv
+import gc
 import numpy as np
-from sklearn.cluster import AgglomerativeClustering
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import List, Dict, Set, FrozenSet, Tuple, Optional, Any
+from typing import List, Dict, Set, FrozenSet, Tuple, Optional, Any, Iterator, Union
 from pathlib import Path
 import sys
 import os
@@ -36,8 +38,32 @@ import os
 # Add database imports (imported only when needed to avoid circular dependencies)
 import importlib
 
+# Faster JSON parser for match files if available
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
-@dataclass
+# Lines sampled before raw JSONL predicates are reordered by selectivity
+_PREDICATE_SAMPLE_LINES = 1000
+
+# Threads writing the per-main-cluster CSVs of the analysis export
+_EXPORT_WRITER_THREADS = 8
+
+# Display thresholds as whole percentages, for progress output
+_CARRY_PCT = int(CARRY_THRESHOLD * 100)
+_GOLD_3STAR_PCT = int(GOLD_3STAR_THRESHOLD * 100)
+_SILVER_3STAR_PCT = int(SILVER_3STAR_THRESHOLD * 100)
+
+# Optional JIT for the per-unit counting and similarity kernels; NumPy fallback otherwise
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+@dataclass(slots=True)
 class Composition:
     """Represents a TFT composition with metadata and carry information."""
     match_id: str
@@ -45,9 +71,13 @@ class Composition:
     riot_id: str
     carries: FrozenSet[str]
     last_round: int
-    participant_data: dict
+    participant_data: Optional[dict]  # None after TFTClusteringEngine.drop_raw_data()
     sub_cluster_id: Optional[int] = None
     main_cluster_id: Optional[int] = None
+    roster_row: Optional[int] = None  # row in the engine's RosterTable
+    carries_mask: int = 0  # carries as a bitmask over the engine's unit ids
+    participant_id: Optional[int] = None  # database rows only
+    db_match_id: Optional[str] = None  # database rows only (UUID match_id)
 
 
 @dataclass
@@ -60,6 +90,212 @@ class SubCluster:
     avg_placement: float
     winrate: float
     top4_rate: float
+    carry_mask: int = 0  # shared carries_mask of the member compositions
+
+
+@dataclass
+class RosterTable:
+    """Struct-of-arrays view of participant rosters, one row per participant."""
+    unit_ids: np.ndarray     # int32 [n, max_units], -1 marks an empty slot
+    item_counts: np.ndarray  # int8 [n, max_units]
+    tiers: np.ndarray        # int8 [n, max_units]
+    placements: np.ndarray   # int8 [n]
+    unit_names: List[str]    # unit id -> character_id, for display only
+
+
+def load_participants_as_soa(participants: List[dict]) -> RosterTable:
+    """
+    Pack participant rosters into padded unit-id / item-count / star-level matrices.
+    
+    Unit ids are assigned in first-appearance order; units without a
+    character_id are skipped.
+    """
+    name_to_id: Dict[str, int] = {}
+    flat_ids, flat_items, flat_tiers, lengths, placements = [], [], [], [], []
+    for participant in participants:
+        count = 0
+        for unit in participant.get('units', []):
+            char_id = unit.get('character_id', '')
+            if not char_id:
+                continue
+            flat_ids.append(name_to_id.setdefault(char_id, len(name_to_id)))
+            flat_items.append(len(unit.get('itemNames', [])))
+            flat_tiers.append(unit.get('tier', 1))
+            count += 1
+        lengths.append(count)
+        placements.append(participant.get('placement', 0))
+    
+    # Scatter the flat lists into padded rows in one shot
+    lengths = np.asarray(lengths, dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    cols = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    
+    unit_ids = np.full((len(lengths), width), -1, dtype=np.int32)
+    item_counts = np.zeros((len(lengths), width), dtype=np.int8)
+    tiers = np.zeros((len(lengths), width), dtype=np.int8)
+    unit_ids[rows, cols] = flat_ids
+    item_counts[rows, cols] = flat_items
+    tiers[rows, cols] = flat_tiers
+    
+    return RosterTable(
+        unit_ids=unit_ids,
+        item_counts=item_counts,
+        tiers=tiers,
+        placements=np.asarray(placements, dtype=np.int8),
+        unit_names=list(name_to_id)
+    )
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _count_unit_properties(unit_ids, item_counts, tiers, n_units):
+        """
+        Per-unit counts over a roster matrix: compositions containing the unit,
+        copies with 2+ items (carries), and 3-star copies.
+        """
+        frequency = np.zeros(n_units, dtype=np.int64)
+        carry_count = np.zeros(n_units, dtype=np.int64)
+        star3_count = np.zeros(n_units, dtype=np.int64)
+        
+        for row in range(unit_ids.shape[0]):
+            for col in range(unit_ids.shape[1]):
+                unit_id = unit_ids[row, col]
+                if unit_id < 0:
+                    continue
+                if item_counts[row, col] >= 2:
+                    carry_count[unit_id] += 1
+                if tiers[row, col] == 3:
+                    star3_count[unit_id] += 1
+                # Presence counts once per composition even with duplicate copies
+                seen = False
+                for prev in range(col):
+                    if unit_ids[row, prev] == unit_id:
+                        seen = True
+                        break
+                if not seen:
+                    frequency[unit_id] += 1
+        
+        return frequency, carry_count, star3_count
+else:
+    def _count_unit_properties(unit_ids, item_counts, tiers, n_units):
+        """
+        Per-unit counts over a roster matrix: compositions containing the unit,
+        copies with 2+ items (carries), and 3-star copies.
+        """
+        present = unit_ids >= 0
+        carry_count = np.bincount(unit_ids[present & (item_counts >= 2)], minlength=n_units)
+        star3_count = np.bincount(unit_ids[present & (tiers == 3)], minlength=n_units)
+        
+        # Presence counts once per composition even with duplicate copies
+        rows = np.nonzero(present)[0]
+        row_units = np.unique(rows.astype(np.int64) * n_units + unit_ids[present])
+        frequency = np.bincount(row_units % n_units, minlength=n_units)
+        
+        return frequency, carry_count, star3_count
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Suspend the cyclic garbage collector while bulk-loading objects that all stay
+    alive; otherwise repeated full collections over the growing heap dominate
+    load time.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _top_n_indices(values: np.ndarray, n: int) -> np.ndarray:
+    """
+    Indices of the n largest values, largest first, ties kept in index order
+    (same result as a stable descending sort, without sorting everything).
+    """
+    candidates = np.arange(len(values))
+    if len(values) > n:
+        # Everything >= the n-th largest value, so boundary ties survive the cut
+        kth_largest = np.partition(values, len(values) - n)[len(values) - n]
+        candidates = np.flatnonzero(values >= kth_largest)
+    order = np.argsort(-values[candidates], kind='stable')
+    return candidates[order][:n]
+
+
+def _carry_similarity_matrix(membership: np.ndarray) -> np.ndarray:
+    """
+    Carry similarity (see _similarity_from_counts) for every pair of rows of a
+    0/1 (sub-cluster x carry unit) matrix. Intersections are one BLAS matmul
+    (float32 is exact for these counts); the diagonal is left at 0.
+    """
+    inter = (membership @ membership.T).astype(np.float64)
+    sizes = membership.sum(axis=1, dtype=np.float64)
+    similarity = _similarity_from_counts(inter, sizes[:, None] + sizes[None, :] - inter)
+    np.fill_diagonal(similarity, 0.0)
+    return similarity
+
+
+def _similarity_from_counts(inter: np.ndarray, union: np.ndarray) -> np.ndarray:
+    """
+    Elementwise carry similarity from common-carry and union counts: the Jaccard
+    coefficient plus a common-carry bonus, capped at 1.0 and 0.0 when none are shared.
+    """
+    shared = inter > 0
+    jaccard = np.divide(inter, union, out=np.zeros_like(inter), where=shared)
+    # Bonus for 2-3 common carries, smaller for 1, penalty for 4+
+    bonus = np.select([(inter >= 2) & (inter <= 3), inter == 1], [0.3, 0.1], default=-0.1)
+    return np.where(shared, np.minimum(1.0, jaccard + bonus), 0.0)
+
+
+# Set bits per byte value, for popcounts over packed carry masks
+_POPCOUNT8 = np.array([bin(b).count('1') for b in range(256)], dtype=np.int64)
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _carry_similarity_from_masks(masks):
+        """
+        _carry_similarity_matrix straight from packed carry bitmasks
+        (uint8 [n, bytes]), popcounting ``&`` per pair; rows run in parallel.
+        """
+        n, n_bytes = masks.shape
+        sizes = np.zeros(n, dtype=np.int64)
+        for i in range(n):
+            for k in range(n_bytes):
+                sizes[i] += _POPCOUNT8[masks[i, k]]
+        
+        similarity = np.zeros((n, n))
+        for i in prange(n):
+            for j in range(i + 1, n):
+                inter = 0
+                for k in range(n_bytes):
+                    inter += _POPCOUNT8[masks[i, k] & masks[j, k]]
+                if inter == 0:
+                    continue
+                
+                jaccard = inter / (sizes[i] + sizes[j] - inter)
+                if 2 <= inter <= 3:
+                    bonus = 0.3
+                elif inter == 1:
+                    bonus = 0.1
+                else:
+                    bonus = -0.1
+                value = min(1.0, jaccard + bonus)
+                similarity[i, j] = value
+                similarity[j, i] = value
+        return similarity
+
+
+def _packed_similarity(packed: np.ndarray) -> np.ndarray:
+    """Dense similarity matrix for packed carry bitmasks (uint8 [n, bytes])."""
+    if HAS_NUMBA:
+        return _carry_similarity_from_masks(packed)
+    # Unpack into a sub-cluster x carry-unit membership matrix; the whole
+    # similarity matrix then comes out of one matrix product
+    membership = np.unpackbits(packed, axis=1, bitorder='little').astype(np.float32)
+    return _carry_similarity_matrix(membership)
 
 
 class TFTClusteringEngine:
@@ -76,6 +312,18 @@ class TFTClusteringEngine:
         self.compositions: List[Composition] = []
         self.sub_clusters: List[SubCluster] = []
         self.main_cluster_assignments: Dict[int, int] = {}
+        self.rosters: Optional[RosterTable] = None
+        # Cluster ids per composition (by position, -1 = unassigned) for vectorized filters
+        self._sub_cluster_ids: Optional[np.ndarray] = None
+        self._main_cluster_ids: Optional[np.ndarray] = None
+        # Lookups built once by the clustering steps for the per-cluster getters
+        self._sub_cluster_by_id: Dict[int, SubCluster] = {}
+        self._main_cluster_index: Dict[int, List[Composition]] = {}
+        # Enhanced display strings by cluster id, reset whenever those clusters are rebuilt
+        self._sub_cluster_displays: Dict[int, str] = {}
+        self._main_cluster_displays: Dict[int, str] = {}
+        self._unit_id: Dict[str, int] = {}  # carry unit -> bit, assigned on first sight
+        self._carry_masks: Dict[FrozenSet[str], int] = {}  # memo for _carry_mask
     
     def extract_carry_units(self, participant: dict) -> FrozenSet[str]:
         """
@@ -93,6 +341,16 @@ class TFTClusteringEngine:
         
         return carry_units
     
+    def _carry_mask(self, carries: FrozenSet[str]) -> int:
+        """Encode a carry set as an integer bitmask, one bit per carry unit."""
+        mask = self._carry_masks.get(carries)
+        if mask is None:
+            mask = 0
+            for unit in carries:
+                mask |= 1 << self._unit_id.setdefault(unit, len(self._unit_id))
+            self._carry_masks[carries] = mask
+        return mask
+    
     def load_compositions_from_database(self, 
                                         filters: Optional[Dict[str, Any]] = None,
                                         batch_size: int = 10000) -> None:
@@ -113,23 +371,24 @@ class TFTClusteringEngine:
                 filters=filters or {}
             )
             
-            # Convert to legacy Composition format for compatibility
-            compositions = []
-            for db_comp in db_compositions:
-                comp = Composition(
-                    match_id=db_comp['game_id'],  # Use game_id for compatibility
-                    puuid=db_comp['puuid'],
-                    riot_id=db_comp['summoner_name'] or '',
-                    carries=db_comp['carries'],
-                    last_round=db_comp['last_round'],
-                    participant_data=db_comp['participant_data']
-                )
-                # Store additional database info for later use
-                comp.participant_id = db_comp['participant_id']
-                comp.db_match_id = db_comp['match_id']  # Store UUID match_id
-                compositions.append(comp)
-            
-            self.compositions = compositions
+            with _gc_paused():
+                # Convert to legacy Composition format for compatibility
+                self.compositions = [
+                    Composition(
+                        match_id=db_comp['game_id'],  # Use game_id for compatibility
+                        puuid=db_comp['puuid'],
+                        riot_id=db_comp['summoner_name'] or '',
+                        carries=db_comp['carries'],
+                        last_round=db_comp['last_round'],
+                        participant_data=db_comp['participant_data'],
+                        carries_mask=self._carry_mask(db_comp['carries']),
+                        # Store additional database info for later use
+                        participant_id=db_comp['participant_id'],
+                        db_match_id=db_comp['match_id']  # Store UUID match_id
+                    )
+                    for db_comp in db_compositions
+                ]
+                self._build_roster_table()
             print(f"   Loaded {len(self.compositions)} compositions from database")
             
         except ImportError as e:
@@ -140,73 +399,110 @@ class TFTClusteringEngine:
             print(f"   Error loading compositions from database: {e}")
             raise
     
-    def load_compositions(self, jsonl_filename: str) -> None:
-        """Load and process compositions from JSONL file (legacy method)."""
+    def load_compositions(self, jsonl_filename: str,
+                          skip_keys: Optional[Set[Tuple[str, str]]] = None) -> None:
+        """
+        Load and process compositions from JSONL file (legacy method).
+        
+        :param jsonl_filename: Input JSONL file with match data
+        :param skip_keys: (match_id, puuid) pairs to leave out, e.g. ones already clustered
+        """
         print("1. Loading compositions from match data...")
         print("   Note: Consider using load_compositions_from_database() for better performance")
         
         compositions = []
-        for match in self._query_jsonl(jsonl_filename):
-            match_id = match['metadata']['match_id']
-            
-            for participant in match['info']['participants']:
-                puuid = participant['puuid']
-                riot_id = f"{participant.get('riotIdGameName', '')}#{participant.get('riotIdTagline', '')}"
-                carries = self.extract_carry_units(participant)
-                last_round = participant.get('last_round', 50)
+        with _gc_paused():
+            for match in self._query_jsonl(jsonl_filename):
+                match_id = match['metadata']['match_id']
                 
-                comp = Composition(
-                    match_id=match_id,
-                    puuid=puuid,
-                    riot_id=riot_id,
-                    carries=carries,
-                    last_round=last_round,
-                    participant_data=participant
-                )
-                compositions.append(comp)
-        
-        self.compositions = compositions
+                for participant in match['info']['participants']:
+                    puuid = participant['puuid']
+                    if skip_keys and (match_id, puuid) in skip_keys:
+                        continue
+                    riot_id = f"{participant.get('riotIdGameName', '')}#{participant.get('riotIdTagline', '')}"
+                    carries = self.extract_carry_units(participant)
+                    last_round = participant.get('last_round', 50)
+                    
+                    comp = Composition(
+                        match_id=match_id,
+                        puuid=puuid,
+                        riot_id=riot_id,
+                        carries=carries,
+                        last_round=last_round,
+                        participant_data=participant,
+                        carries_mask=self._carry_mask(carries)
+                    )
+                    compositions.append(comp)
+            
+            self.compositions = compositions
+            self._build_roster_table()
         print(f"   Loaded {len(self.compositions)} compositions")
     
+    def _build_roster_table(self) -> None:
+        """Pack all loaded rosters into one RosterTable; compositions keep their row."""
+        for row, comp in enumerate(self.compositions):
+            comp.roster_row = row
+        self.rosters = load_participants_as_soa([comp.participant_data for comp in self.compositions])
+        self._sub_cluster_ids = np.full(len(self.compositions), -1, dtype=np.int32)
+        self._main_cluster_ids = np.full(len(self.compositions), -1, dtype=np.int32)
+    
+    def drop_raw_data(self) -> None:
+        """
+        Release each composition's participant dict once rosters are packed.
+        
+        Everything downstream reads the RosterTable, so pipelines call this
+        right after loading; the raw dicts dominate memory on large loads.
+        """
+        for comp in self.compositions:
+            comp.participant_data = None
+    
     def create_sub_clusters(self) -> None:
         """Create sub-clusters based on exact carry matching."""
         print("\n2. Creating sub-clusters (exact carry matching)...")
         
-        # Group compositions by identical carry sets
+        # Group composition rows by identical carry sets (equal sets <=> equal masks)
         carry_groups = defaultdict(list)
-        for comp in self.compositions:
-            carry_groups[comp.carries].append(comp)
+        for row, comp in enumerate(self.compositions):
+            carry_groups[comp.carries_mask].append(row)
         
         # Create sub-clusters from groups meeting minimum size
         sub_clusters = []
         sub_cluster_id = 0
+        all_placements = self.rosters.placements
         
-        for carry_set, comps in carry_groups.items():
-            if len(comps) >= self.min_sub_cluster_size:
-                # Calculate statistics
-                avg_placement = sum(c.participant_data['placement'] for c in comps) / len(comps)
-                winrate = sum(1 for c in comps if c.participant_data['placement'] == 1) / len(comps) * 100
-                top4_rate = sum(1 for c in comps if c.participant_data['placement'] <= 4) / len(comps) * 100
+        for carry_mask, rows in carry_groups.items():
+            if len(rows) >= self.min_sub_cluster_size:
+                comps = [self.compositions[row] for row in rows]
+                
+                # Calculate statistics over the group's slice of the placement array
+                placements = all_placements[rows]
+                avg_placement = int(placements.sum()) / len(rows)
+                winrate = int(np.count_nonzero(placements == 1)) / len(rows) * 100
+                top4_rate = int(np.count_nonzero(placements <= 4)) / len(rows) * 100
                 
                 # Create sub-cluster
                 sub_cluster = SubCluster(
                     id=sub_cluster_id,
-                    carry_set=carry_set,
+                    carry_set=comps[0].carries,
                     compositions=comps,
                     size=len(comps),
                     avg_placement=round(avg_placement, 2),
                     winrate=round(winrate, 2),
-                    top4_rate=round(top4_rate, 2)
+                    top4_rate=round(top4_rate, 2),
+                    carry_mask=carry_mask
                 )
                 
                 # Assign sub-cluster ID to compositions
                 for comp in comps:
                     comp.sub_cluster_id = sub_cluster_id
+                self._sub_cluster_ids[rows] = sub_cluster_id
                 
                 sub_clusters.append(sub_cluster)
                 sub_cluster_id += 1
         
         self.sub_clusters = sub_clusters
+        self._sub_cluster_by_id = {sc.id: sc for sc in sub_clusters}
+        self._sub_cluster_displays = {}
         print(f"   Created {len(self.sub_clusters)} valid sub-clusters")
         print(f"   Sub-clustered {sum(sc.size for sc in self.sub_clusters)} compositions")
     
@@ -218,32 +514,70 @@ class TFTClusteringEngine:
             print("   Not enough sub-clusters for main clustering")
             return
         
-        # Build similarity matrix between sub-clusters
-        n = len(self.sub_clusters)
-        similarity_matrix = np.zeros((n, n))
+        # Imported here: scipy is slow to import and only needed for this step
+        from scipy import sparse
+        from scipy.cluster.hierarchy import fcluster
+        from scipy.sparse.csgraph import connected_components
+        try:
+            from fastcluster import linkage
+        except ImportError:
+            from scipy.cluster.hierarchy import linkage
         
-        for i in range(n):
-            for j in range(i + 1, n):
-                similarity = self._calculate_carry_similarity(
-                    self.sub_clusters[i].carry_set,
-                    self.sub_clusters[j].carry_set
-                )
-                similarity_matrix[i, j] = similarity
-                similarity_matrix[j, i] = similarity
-        
-        # Convert similarity to distance matrix
-        distance_matrix = 1.0 - similarity_matrix
-        
-        # Perform agglomerative clustering
-        # Use distance threshold to ensure clusters have meaningful commonality
-        clustering = AgglomerativeClustering(
-            n_clusters=None,
-            linkage='average',
-            metric='precomputed',
-            distance_threshold=0.4  # Requires at least 60% similarity
-        )
+        # Pack each sub-cluster's carry bitmask into a row of bytes
+        n_bytes = max(1, (len(self._unit_id) + 7) // 8)
+        packed = np.frombuffer(
+            b''.join(sc.carry_mask.to_bytes(n_bytes, 'little') for sc in self.sub_clusters),
+            dtype=np.uint8
+        ).reshape(len(self.sub_clusters), n_bytes)
         
-        main_labels = clustering.fit_predict(distance_matrix)
+        n = len(self.sub_clusters)
+        distance_threshold = 0.4  # Requires at least 60% similarity
+        
+        # Candidate pairs: only sub-clusters sharing a carry can be similar. A
+        # sparse membership product counts common carries for exactly those pairs
+        # (an inverted index over carry units), never materializing n x n
+        membership = sparse.csr_matrix(np.unpackbits(packed, axis=1, bitorder='little'), dtype=np.float32)
+        sizes = np.asarray(membership.sum(axis=1), dtype=np.float64).ravel()
+        common = sparse.triu(membership @ membership.T, k=1).tocoo()
+        inter = common.data.astype(np.float64)
+        similarity = _similarity_from_counts(inter, sizes[common.row] + sizes[common.col] - inter)
+        close = 1.0 - similarity < distance_threshold
+        
+        # Average linkage only merges clusters whose mean distance is below the
+        # threshold, which needs at least one close pair across them; so every
+        # main cluster lies inside one connected component of the close-pair graph
+        # and each component can be clustered on its own
+        graph = sparse.coo_matrix(
+            (np.ones(int(close.sum()), dtype=np.int8), (common.row[close], common.col[close])),
+            shape=(n, n)
+        )
+        n_components, component = connected_components(graph, directed=False)
+        
+        labels = np.arange(n)  # sub-clusters outside any large component stand alone
+        next_label = n
+        component_sizes = np.bincount(component, minlength=n_components)
+        order = np.argsort(component, kind='stable')
+        for members in np.split(order, np.cumsum(component_sizes)[:-1]):
+            # Smaller components cannot produce a valid main cluster
+            if len(members) < max(2, self.min_main_cluster_size):
+                continue
+            
+            # Convert similarity to a condensed distance matrix
+            distance_matrix = 1.0 - _packed_similarity(packed[members])
+            distances = distance_matrix[np.triu_indices(len(members), k=1)]
+            
+            # Average-linkage agglomerative clustering, cut so that only merges
+            # strictly below the threshold count (clusters need meaningful commonality)
+            tree = linkage(distances, method='average')
+            local_labels = fcluster(tree, t=np.nextafter(distance_threshold, 0), criterion='distance') - 1
+            labels[members] = next_label + local_labels
+            next_label += local_labels.max() + 1
+        
+        # Number main clusters 0.. in order of their first sub-cluster
+        _, first_index, inverse = np.unique(labels, return_index=True, return_inverse=True)
+        rank = np.empty(len(first_index), dtype=np.int64)
+        rank[np.argsort(first_index)] = np.arange(len(first_index))
+        main_labels = rank[inverse]
         
         # Process main cluster assignments
         main_cluster_sizes = Counter(main_labels)
@@ -261,40 +595,24 @@ class TFTClusteringEngine:
                 # Propagate to compositions
                 for comp in sub_cluster.compositions:
                     comp.main_cluster_id = main_cluster_id
+                    self._main_cluster_ids[comp.roster_row] = main_cluster_id
+        
+        self._build_main_cluster_index()
         
         print(f"   Created {len(valid_main_clusters)} main clusters")
         print(f"   Grouped {len([sc for sc in self.sub_clusters if sc.id in self.main_cluster_assignments])} sub-clusters")
     
-    def _calculate_carry_similarity(self, carries1: FrozenSet[str], carries2: FrozenSet[str]) -> float:
-        """
-        Calculate similarity between two carry sets based on common units.
-        
-        Returns similarity score between 0.0 and 1.0 based on:
-        - Common carries / max(len(carries1), len(carries2))
-        - Bonus for having 2-3 common carries (ideal range)
-        """
-        if not carries1 or not carries2:
-            return 0.0
-        
-        common_carries = carries1.intersection(carries2)
-        common_count = len(common_carries)
-        
-        if common_count == 0:
-            return 0.0
-        
-        # Base similarity: Jaccard coefficient
-        union_size = len(carries1.union(carries2))
-        jaccard = common_count / union_size if union_size > 0 else 0.0
-        
-        # Bonus for having 2-3 common carries (sweet spot for clustering)
-        if 2 <= common_count <= 3:
-            bonus = 0.3
-        elif common_count == 1:
-            bonus = 0.1
-        else:
-            bonus = -0.1  # Penalize too many or too few common carries
-        
-        return min(1.0, jaccard + bonus)
+    def _build_main_cluster_index(self) -> None:
+        """Index compositions by main cluster id, each list in load order."""
+        rows = np.flatnonzero(self._main_cluster_ids >= 0)
+        ids = self._main_cluster_ids[rows]
+        order = np.argsort(ids, kind='stable')
+        cluster_ids, starts = np.unique(ids[order], return_index=True)
+        self._main_cluster_index = {
+            cluster_id: [self.compositions[row] for row in group]
+            for cluster_id, group in zip(cluster_ids.tolist(), np.split(rows[order], starts[1:]))
+        }
+        self._main_cluster_displays = {}
     
     def save_results_to_database(self) -> None:
         """Save clustering results to PostgreSQL database."""
@@ -308,36 +626,17 @@ class TFTClusteringEngine:
             # Initialize database clustering engine
             db_engine = DatabaseClusteringEngine()
             
-            # Prepare cluster assignments for database storage
-            cluster_assignments = []
-            missing_ids_count = 0
-            
-            for comp in self.compositions:
-                participant_id = getattr(comp, 'participant_id', None)
-                db_match_id = getattr(comp, 'db_match_id', None)
-                
-                # Skip if we don't have required database IDs
-                if not participant_id or not db_match_id:
-                    missing_ids_count += 1
-                    continue
-                
-                assignment = {
-                    'match_id': db_match_id,  # Use UUID match_id
-                    'puuid': comp.puuid,
-                    'participant_id': participant_id,
-                    'sub_cluster_id': comp.sub_cluster_id if comp.sub_cluster_id is not None else -1,
-                    'main_cluster_id': comp.main_cluster_id if comp.main_cluster_id is not None else -1,
-                    'carry_units': list(comp.carries) if comp.carries else [],
-                    'similarity_scores': getattr(comp, 'similarity_scores', {})
-                }
-                cluster_assignments.append(assignment)
-            
+            # Skip compositions we can't link back to database rows
+            missing_ids_count = sum(
+                1 for comp in self.compositions
+                if not comp.participant_id or not comp.db_match_id
+            )
             if missing_ids_count > 0:
                 print(f"   Warning: Skipped {missing_ids_count} compositions due to missing database IDs")
             
-            if cluster_assignments:
-                # Store in database
-                stored_count = db_engine.store_cluster_assignments(cluster_assignments)
+            if missing_ids_count < len(self.compositions):
+                # Stream assignments into COPY batches instead of building them all up front
+                stored_count = db_engine.copy_cluster_assignments(self._iter_cluster_assignments())
                 print(f"   Saved {stored_count} cluster assignments to database")
             else:
                 print("   Warning: No valid cluster assignments to save")
@@ -350,16 +649,42 @@ class TFTClusteringEngine:
             print(f"   Error saving results to database: {e}")
             raise
     
-    def save_results(self, csv_filename: str = 'hierarchical_clusters.csv') -> None:
-        """Save clustering results to CSV with both sub-cluster and main cluster information."""
+    def _iter_cluster_assignments(self):
+        """Yield database cluster assignments for compositions that have database IDs."""
+        carry_lists = {}  # carries_mask -> carry unit list, shared by a sub-cluster's rows
+        for comp in self.compositions:
+            if not comp.participant_id or not comp.db_match_id:
+                continue
+            
+            carry_units = carry_lists.get(comp.carries_mask)
+            if carry_units is None:
+                carry_units = carry_lists[comp.carries_mask] = list(comp.carries)
+            
+            yield {
+                'match_id': comp.db_match_id,  # Use UUID match_id
+                'puuid': comp.puuid,
+                'participant_id': comp.participant_id,
+                'sub_cluster_id': comp.sub_cluster_id if comp.sub_cluster_id is not None else -1,
+                'main_cluster_id': comp.main_cluster_id if comp.main_cluster_id is not None else -1,
+                'carry_units': carry_units
+            }
+    
+    def save_results(self, csv_filename: str = 'hierarchical_clusters.csv', append: bool = False) -> None:
+        """
+        Save clustering results to CSV with both sub-cluster and main cluster information.
+        
+        :param csv_filename: Output CSV file
+        :param append: Add rows to an existing results file instead of rewriting it
+        """
         print(f"\n4. Saving results to {csv_filename}...")
         
-        with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
+        with open(csv_filename, 'a' if append else 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f)
-            writer.writerow([
-                'match_id', 'puuid', 'riot_id', 'sub_cluster_id', 'main_cluster_id',
-                'carries', 'last_round'
-            ])
+            if not append:
+                writer.writerow([
+                    'match_id', 'puuid', 'riot_id', 'sub_cluster_id', 'main_cluster_id',
+                    'carries', 'last_round'
+                ])
             
             for comp in self.compositions:
                 carries_str = ','.join(sorted(comp.carries)) if comp.carries else 'NO_CARRIES'
@@ -376,6 +701,26 @@ class TFTClusteringEngine:
         
         print(f"   Saved {len(self.compositions)} compositions with clustering data")
     
+    def assign_known_carry_sets(self, carry_set_clusters: Dict[FrozenSet[str], Tuple[int, int]]) -> int:
+        """
+        Give loaded compositions the cluster ids of an earlier run by exact carry set.
+        
+        Sub-clusters are exact carry sets and main clusters are built from carry sets
+        alone, so a new composition with a known carry set belongs to the same pair.
+        
+        :param carry_set_clusters: Carry set -> (sub_cluster_id, main_cluster_id)
+        :return: Number of compositions assigned
+        """
+        assigned = 0
+        for row, comp in enumerate(self.compositions):
+            cluster_ids = carry_set_clusters.get(comp.carries)
+            if cluster_ids is None:
+                continue
+            comp.sub_cluster_id, comp.main_cluster_id = cluster_ids
+            self._sub_cluster_ids[row], self._main_cluster_ids[row] = cluster_ids
+            assigned += 1
+        return assigned
+    
     def get_frequent_carries_in_main_cluster(self, main_cluster_id: int, frequency_threshold: float = 0.9) -> List[str]:
         """
         Get carries that appear in at least X% of matches within a main cluster.
@@ -385,21 +730,20 @@ class TFTClusteringEngine:
         :return: List of carry units that meet the frequency threshold
         """
         # Get all compositions in this main cluster
-        main_cluster_compositions = [
-            comp for comp in self.compositions 
-            if comp.main_cluster_id == main_cluster_id
-        ]
+        main_cluster_compositions = self._compositions_in_main_cluster(main_cluster_id)
         
         if not main_cluster_compositions:
             return []
         
-        # Count how many times each carry appears
-        carry_counts = defaultdict(int)
+        # Count how many times each carry appears. A main cluster holds only a few
+        # distinct carry sets (one per sub-cluster), so count the sets first
+        # (frozensets cache their hash) and expand each distinct set once
+        carry_counts = Counter()
         total_matches = len(main_cluster_compositions)
         
-        for comp in main_cluster_compositions:
-            for carry in comp.carries:
-                carry_counts[carry] += 1
+        for carries, count in Counter(comp.carries for comp in main_cluster_compositions).items():
+            for carry in carries:
+                carry_counts[carry] += count
         
         # Filter carries that meet frequency threshold
         frequent_carries = []
@@ -421,104 +765,96 @@ class TFTClusteringEngine:
             return ""
         
         total_matches = len(compositions)
-        unit_stats = defaultdict(lambda: {
-            'frequency': 0,
-            'carry_count': 0,
-            'star_counts': defaultdict(int)
-        })
-        
-        # Analyze each composition
-        for comp in compositions:
-            units_in_comp = set()
-            
-            for unit in comp.participant_data.get('units', []):
-                char_id = unit.get('character_id', '')
-                if not char_id:
-                    continue
-                    
-                units_in_comp.add(char_id)
-                
-                # Count star level
-                tier = unit.get('tier', 1)
-                unit_stats[char_id]['star_counts'][tier] += 1
-                
-                # Count if it's a carry (2+ items)
-                item_count = len(unit.get('itemNames', []))
-                if item_count >= 2:
-                    unit_stats[char_id]['carry_count'] += 1
-            
-            # Count frequency (presence in match, not duplicates)
-            for unit_name in units_in_comp:
-                unit_stats[unit_name]['frequency'] += 1
+        if self.rosters is not None and all(comp.roster_row is not None for comp in compositions):
+            rosters = self.rosters
+            rows = np.fromiter((comp.roster_row for comp in compositions), dtype=np.int64, count=total_matches)
+            unit_ids = rosters.unit_ids[rows]
+            item_counts = rosters.item_counts[rows]
+            tiers = rosters.tiers[rows]
+        else:
+            rosters = load_participants_as_soa([comp.participant_data for comp in compositions])
+            unit_ids, item_counts, tiers = rosters.unit_ids, rosters.item_counts, rosters.tiers
         
-        # Calculate percentages and create display names
-        unit_display_list = []
+        frequency, carry_count, star3_count = _count_unit_properties(
+            unit_ids, item_counts, tiers, len(rosters.unit_names)
+        )
         
-        for unit_name, stats in unit_stats.items():
-            frequency = stats['frequency'] / total_matches
-            carry_frequency = stats['carry_count'] / total_matches if stats['frequency'] > 0 else 0
-            
-            # Calculate 3-star frequency
-            star3_count = stats['star_counts'][3]
-            star3_frequency = star3_count / stats['frequency'] if stats['frequency'] > 0 else 0
-            
-            # Build display name with prefixes
-            display_name = unit_name
+        # Units present in this cluster, in order of first appearance
+        present = unit_ids[unit_ids >= 0]
+        cluster_units, first_seen = np.unique(present, return_index=True)
+        cluster_units = cluster_units[np.argsort(first_seen)]
+        
+        # Calculate percentages and classify every unit at once
+        unit_frequency = frequency[cluster_units] / total_matches
+        carry_frequency = carry_count[cluster_units] / total_matches
+        star3_frequency = star3_count[cluster_units] / frequency[cluster_units]
+        
+        is_carry = carry_frequency >= CARRY_THRESHOLD
+        is_gold3 = star3_frequency >= GOLD_3STAR_THRESHOLD
+        is_silver3 = ~is_gold3 & (star3_frequency >= SILVER_3STAR_THRESHOLD)
+        
+        # Build display names with prefixes for the top N units only
+        top_units = []
+        for i in _top_n_indices(unit_frequency, TOP_UNITS_COUNT):
+            display_name = rosters.unit_names[cluster_units[i]]
             
             # Add star prefixes (gold takes priority over silver)
-            if star3_frequency >= GOLD_3STAR_THRESHOLD:
+            if is_gold3[i]:
                 display_name = f"g3star_{display_name}"
-            elif star3_frequency >= SILVER_3STAR_THRESHOLD:
+            elif is_silver3[i]:
                 display_name = f"s3star_{display_name}"
             
             # Add carry prefix
-            if carry_frequency >= CARRY_THRESHOLD:
+            if is_carry[i]:
                 display_name = f"Carry_{display_name}"
             
-            unit_display_list.append((display_name, frequency))
-        
-        # Sort by frequency and take top N
-        unit_display_list.sort(key=lambda x: x[1], reverse=True)
-        top_units = unit_display_list[:TOP_UNITS_COUNT]
+            top_units.append(display_name)
         
-        return ', '.join([unit[0] for unit in top_units])
+        return ', '.join(top_units)
+
+    def _compositions_in_main_cluster(self, main_cluster_id: int) -> List[Composition]:
+        """Compositions of one main cluster, in load order."""
+        return self._main_cluster_index.get(main_cluster_id, [])
 
     def get_enhanced_main_cluster_display(self, main_cluster_id: int) -> str:
         """Get enhanced display string for main cluster showing top units with prefixes."""
-        main_cluster_compositions = [
-            comp for comp in self.compositions 
-            if comp.main_cluster_id == main_cluster_id
-        ]
-        return self.analyze_unit_properties_in_cluster(main_cluster_compositions)
+        display = self._main_cluster_displays.get(main_cluster_id)
+        if display is None:
+            main_cluster_compositions = self._compositions_in_main_cluster(main_cluster_id)
+            display = self.analyze_unit_properties_in_cluster(main_cluster_compositions)
+            self._main_cluster_displays[main_cluster_id] = display
+        return display
 
     def get_enhanced_sub_cluster_display(self, sub_cluster_id: int) -> str:
         """Get enhanced display string for sub-cluster showing top units with prefixes."""
-        # Find the sub-cluster
-        sub_cluster = None
-        for sc in self.sub_clusters:
-            if sc.id == sub_cluster_id:
-                sub_cluster = sc
-                break
+        display = self._sub_cluster_displays.get(sub_cluster_id)
+        if display is not None:
+            return display
+        
+        sub_cluster = self._sub_cluster_by_id.get(sub_cluster_id)
         
         if not sub_cluster:
             return ""
         
-        return self.analyze_unit_properties_in_cluster(sub_cluster.compositions)
+        display = self.analyze_unit_properties_in_cluster(sub_cluster.compositions)
+        self._sub_cluster_displays[sub_cluster_id] = display
+        return display
 
     def get_clustering_statistics(self) -> Dict:
         """Generate comprehensive clustering statistics."""
         total_compositions = len(self.compositions)
-        sub_clustered = len([c for c in self.compositions if c.sub_cluster_id is not None])
-        main_clustered = len([c for c in self.compositions if c.main_cluster_id is not None])
+        sub_ids = self._sub_cluster_ids if self._sub_cluster_ids is not None else np.empty(0, dtype=np.int32)
+        main_ids = self._main_cluster_ids if self._main_cluster_ids is not None else np.empty(0, dtype=np.int32)
+        sub_clustered = int(np.count_nonzero(sub_ids >= 0))
+        main_clustered = int(np.count_nonzero(main_ids >= 0))
         
         # Sub-cluster statistics
         sub_cluster_sizes = [sc.size for sc in self.sub_clusters]
         
-        # Main cluster statistics  
-        main_cluster_compositions = defaultdict(int)
-        for comp in self.compositions:
-            if comp.main_cluster_id is not None:
-                main_cluster_compositions[comp.main_cluster_id] += 1
+        # Main cluster statistics (composition counts, in order of first composition)
+        main_labels, first_seen, counts = np.unique(main_ids[main_ids >= 0], return_index=True, return_counts=True)
+        order = np.argsort(first_seen)
+        main_cluster_compositions = dict(zip(main_labels[order].tolist(), counts[order].tolist()))
         
         return {
             'total_compositions': total_compositions,
@@ -536,14 +872,43 @@ class TFTClusteringEngine:
             }
         }
     
-    def _query_jsonl(self, filename: str, filter_func=None):
-        """Query JSONL file with optional filtering."""
-        with open(filename, 'r', encoding='utf-8') as f:
+    def _query_jsonl(self, filename: str, filter_func=None, raw_predicates=()):
+        """
+        Query JSONL file with optional filtering.
+        
+        raw_predicates are checked against each line's raw bytes before it is
+        parsed (e.g. ``lambda raw: b'"tft_set_number": 14' in raw``), so lines
+        they reject are never decoded. After a short sample they are reordered
+        to run the most selective first; filter_func then sees the parsed match.
+        """
+        predicates = list(raw_predicates)
+        passes = [0] * len(predicates)
+        sampled = 0
+        
+        # Bytes go straight to the parser (both accept UTF-8 and surrounding whitespace)
+        with open(filename, 'rb', buffering=1 << 20) as f:
             for line in f:
-                if line.strip():
-                    match = json.loads(line.strip())
-                    if filter_func is None or filter_func(match):
-                        yield match
+                if line.isspace():
+                    continue
+                
+                if predicates:
+                    if sampled < _PREDICATE_SAMPLE_LINES:
+                        # Evaluate every predicate while sampling to measure pass rates
+                        results = [predicate(line) for predicate in predicates]
+                        for i, passed in enumerate(results):
+                            passes[i] += passed
+                        sampled += 1
+                        if sampled == _PREDICATE_SAMPLE_LINES:
+                            order = sorted(range(len(predicates)), key=passes.__getitem__)
+                            predicates = [predicates[i] for i in order]
+                        if not all(results):
+                            continue
+                    elif not all(predicate(line) for predicate in predicates):
+                        continue
+                
+                match = _json_loads(line)
+                if filter_func is None or filter_func(match):
+                    yield match
 
 
 def run_incremental_clustering_pipeline(
@@ -652,6 +1017,7 @@ def run_database_clustering_pipeline(
     try:
         # Execute clustering pipeline with database backend
         engine.load_compositions_from_database(filters=filters)
+        engine.drop_raw_data()
         engine.create_sub_clusters()
         engine.create_main_clusters()
         
@@ -714,8 +1080,9 @@ def run_hierarchical_clustering_pipeline(
     jsonl_filename: str = 'matches_filtered.jsonl',
     csv_filename: str = 'hierarchical_clusters.csv',
     min_sub_cluster_size: int = 5,
-    min_main_cluster_size: int = 3
-) -> Dict:
+    min_main_cluster_size: int = 3,
+    return_engine: bool = False
+) -> Union[Dict, Tuple[Dict, 'TFTClusteringEngine']]:
     """
     Run the complete two-level clustering pipeline.
     
@@ -723,6 +1090,7 @@ def run_hierarchical_clustering_pipeline(
     :param csv_filename: Output CSV file for clustering results
     :param min_sub_cluster_size: Minimum size for valid sub-clusters
     :param min_main_cluster_size: Minimum size for valid main clusters
+    :param return_engine: Also return the clustered engine, as (stats, engine)
     :return: Dictionary with clustering statistics
     """
     print("=== TFT Two-Level Clustering Pipeline ===\n")
@@ -736,6 +1104,7 @@ def run_hierarchical_clustering_pipeline(
     try:
         # Execute clustering pipeline
         engine.load_compositions(jsonl_filename)
+        engine.drop_raw_data()
         engine.create_sub_clusters()
         engine.create_main_clusters()
         engine.save_results(csv_filename)
@@ -759,41 +1128,118 @@ def run_hierarchical_clustering_pipeline(
         print("Main clusters: Groups of sub-clusters with 2-3 common carries")
         print("Carry detection: Units with 2 or more items are considered carries")
         print(f"Display format: Top {TOP_UNITS_COUNT} units with prefixes:")
-        print(f"  - Carry_ prefix for units that are carries ≥{int(CARRY_THRESHOLD*100)}% of the time")
-        print(f"  - g3star_ prefix for units that are 3-star ≥{int(GOLD_3STAR_THRESHOLD*100)}% of the time")
-        print(f"  - s3star_ prefix for units that are 3-star ≥{int(SILVER_3STAR_THRESHOLD*100)}% of the time")
+        print(f"  - Carry_ prefix for units that are carries ≥{_CARRY_PCT}% of the time")
+        print(f"  - g3star_ prefix for units that are 3-star ≥{_GOLD_3STAR_PCT}% of the time")
+        print(f"  - s3star_ prefix for units that are 3-star ≥{_SILVER_3STAR_PCT}% of the time")
         
-        return stats
+        return (stats, engine) if return_engine else stats
         
     except Exception as e:
         print(f"Error in clustering pipeline: {e}")
+        return ({}, engine) if return_engine else {}
+
+
+def run_incremental_file_clustering_pipeline(
+    jsonl_filename: str = 'matches_filtered.jsonl',
+    csv_filename: str = 'hierarchical_clusters.csv',
+    min_sub_cluster_size: int = 5,
+    min_main_cluster_size: int = 3
+) -> Dict:
+    """
+    Cluster only compositions missing from an earlier file-based run's results CSV.
+    
+    New compositions whose carry set is already a sub-cluster get that sub-cluster
+    and its main cluster; the rest stay unassigned (-1) until the next full run.
+    Rows are appended to csv_filename. Without an earlier CSV this is a full run.
+    
+    :param jsonl_filename: Input JSONL file with match data
+    :param csv_filename: Results CSV of the earlier run, appended to
+    :param min_sub_cluster_size: Minimum size for valid sub-clusters (full run only)
+    :param min_main_cluster_size: Minimum size for valid main clusters (full run only)
+    :return: Dictionary with incremental clustering statistics
+    """
+    print("=== TFT Incremental File-Based Clustering Pipeline ===\n")
+    
+    if not os.path.exists(csv_filename):
+        print(f"No previous results at {csv_filename}; running full clustering\n")
+        return run_hierarchical_clustering_pipeline(
+            jsonl_filename=jsonl_filename,
+            csv_filename=csv_filename,
+            min_sub_cluster_size=min_sub_cluster_size,
+            min_main_cluster_size=min_main_cluster_size
+        )
+    
+    # Already clustered compositions, and the cluster pair each known carry set maps to
+    known_keys = set()
+    carry_set_clusters = {}
+    with open(csv_filename, 'r', newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            known_keys.add((row['match_id'], row['puuid']))
+            if row['sub_cluster_id'] != '-1':
+                carries = frozenset() if row['carries'] == 'NO_CARRIES' else frozenset(row['carries'].split(','))
+                carry_set_clusters[carries] = (int(row['sub_cluster_id']), int(row['main_cluster_id']))
+    print(f"Previous run: {len(known_keys)} compositions, {len(carry_set_clusters)} sub-clusters")
+    
+    engine = TFTClusteringEngine(
+        min_sub_cluster_size=min_sub_cluster_size,
+        min_main_cluster_size=min_main_cluster_size
+    )
+    
+    try:
+        engine.load_compositions(jsonl_filename, skip_keys=known_keys)
+        if not engine.compositions:
+            print("No new compositions found. All matches have been clustered.")
+            return {'message': 'No new matches to cluster'}
+        
+        engine.drop_raw_data()
+        assigned = engine.assign_known_carry_sets(carry_set_clusters)
+        engine.save_results(csv_filename, append=True)
+        
+        stats = {
+            'total_compositions': len(engine.compositions),
+            'assigned_compositions': assigned,
+            'unassigned_compositions': len(engine.compositions) - assigned,
+            'message': f"Clustered {len(engine.compositions)} new compositions incrementally"
+        }
+        
+        print(f"\n5. Incremental Clustering Summary:")
+        print(f"   New compositions: {stats['total_compositions']}")
+        print(f"   Assigned to existing sub-clusters: {stats['assigned_compositions']}")
+        print(f"   Unassigned (new carry sets, picked up by the next full run): {stats['unassigned_compositions']}")
+        print(f"Output file: {csv_filename}")
+        
+        return stats
+        
+    except Exception as e:
+        print(f"Error in incremental clustering pipeline: {e}")
         return {}
 
 
 # Legacy compatibility functions
-def query_jsonl(filename, filter_func=None):
+def query_jsonl(filename, filter_func=None, raw_predicates=()):
     """Legacy compatibility function."""
     engine = TFTClusteringEngine()
-    return engine._query_jsonl(filename, filter_func)
+    return engine._query_jsonl(filename, filter_func, raw_predicates)
 
 
-def extract_compositions(jsonl_filename):
-    """Legacy compatibility function for basic composition extraction."""
-    engine = TFTClusteringEngine()
-    engine.load_compositions(jsonl_filename)
-    
-    # Convert to legacy format
-    legacy_compositions = []
-    for comp in engine.compositions:
-        legacy_compositions.append({
-            'match_id': comp.match_id,
-            'puuid': comp.puuid,
-            'riot_id': comp.riot_id,
-            'carries': comp.carries,
-            'participant_data': comp.participant_data
-        })
+def extract_compositions(jsonl_filename) -> Iterator[dict]:
+    """
+    Legacy compatibility function for basic composition extraction.
     
-    return legacy_compositions
+    Yields one legacy composition dict per participant while streaming the
+    file; wrap in list() where a list is needed.
+    """
+    engine = TFTClusteringEngine()
+    for match in engine._query_jsonl(jsonl_filename):
+        match_id = match['metadata']['match_id']
+        for participant in match['info']['participants']:
+            yield {
+                'match_id': match_id,
+                'puuid': participant['puuid'],
+                'riot_id': f"{participant.get('riotIdGameName', '')}#{participant.get('riotIdTagline', '')}",
+                'carries': engine.extract_carry_units(participant),
+                'participant_data': participant
+            }
 
 
 def run_clustering_pipeline(jsonl_filename='matches_filtered.jsonl', csv_filename='clusters.csv', min_cluster_size=5):
@@ -806,6 +1252,53 @@ def run_clustering_pipeline(jsonl_filename='matches_filtered.jsonl', csv_filenam
     )
 
 
+def _write_sub_cluster_csv(filename: str, rows: List[tuple]) -> None:
+    """Write one main cluster's sub-cluster rows (already formatted) with the export header."""
+    with open(filename, 'w', newline='', encoding='utf-8') as subfile:
+        subwriter = csv.writer(subfile)
+        subwriter.writerow(['sub_cluster_id', 'size', f'top_{TOP_UNITS_COUNT}_units', 'avg_place', 'winrate', 'top4_rate'])
+        subwriter.writerows(rows)
+
+
+def _main_cluster_stats(engine: 'TFTClusteringEngine') -> Dict[int, Dict]:
+    """
+    Placement statistics for every main cluster of an already clustered engine.
+
+    :param engine: Engine after create_main_clusters()
+    :return: Dictionary mapping main cluster ID to TFTQuery.get_stats()-style statistics
+    """
+    # Group every clustered composition's placement by main cluster id in a few C-level passes
+    clustered = engine._main_cluster_ids >= 0
+    cluster_ids = engine._main_cluster_ids[clustered]
+    placements = engine.rosters.placements[clustered]
+    if not len(cluster_ids):
+        return {}
+    
+    n_clusters = int(cluster_ids.max()) + 1
+    counts = np.bincount(cluster_ids, minlength=n_clusters)
+    present = np.flatnonzero(counts)
+    counts = counts[present]
+    placement_sums = np.bincount(cluster_ids, weights=placements, minlength=n_clusters)[present]
+    wins = np.bincount(cluster_ids[placements == 1], minlength=n_clusters)[present]
+    top4 = np.bincount(cluster_ids[placements <= 4], minlength=n_clusters)[present]
+    
+    avg_placements = (placement_sums / counts).tolist()
+    winrates = (wins / counts * 100).tolist()
+    top4_rates = (top4 / counts * 100).tolist()
+    
+    return {
+        cluster_id: {
+            'play_count': count,
+            'avg_placement': round(avg_placement, 2),
+            'winrate': round(winrate, 2),
+            'top4_rate': round(top4_rate, 2)
+        }
+        for cluster_id, count, avg_placement, winrate, top4_rate in zip(
+            present.tolist(), counts.tolist(), avg_placements, winrates, top4_rates
+        )
+    }
+
+
 if __name__ == "__main__":
     import argparse
     
@@ -827,6 +1320,7 @@ Examples:
   python clustering.py --input matches.jsonl            # Specify input file
   python clustering.py --output my_clusters.csv         # Specify output file
   python clustering.py --min-sub-cluster-size 3         # Set minimum sub-cluster size
+  python clustering.py --incremental                    # Only cluster matches not yet in --output
         """
     )
     
@@ -866,6 +1360,7 @@ Examples:
                        help='Batch size for database processing (default: 10000)')
     
     args = parser.parse_args()
+    engine = None  # clustered engine reused by the export below, when the pipeline provides one
     
     print("TFT Clustering System")
     print("=" * 50)
@@ -928,15 +1423,28 @@ Examples:
         print(f"Min main cluster size: {args.min_main_cluster_size}")
         print()
         
-        # Run the hierarchical clustering pipeline
-        stats = run_hierarchical_clustering_pipeline(
-            jsonl_filename=args.input,
-            csv_filename=args.output,
-            min_sub_cluster_size=args.min_sub_cluster_size,
-            min_main_cluster_size=args.min_main_cluster_size
-        )
+        if args.incremental and not args.force_recluster and os.path.exists(args.output):
+            # Append new compositions to the previous results; no full analysis export
+            stats = run_incremental_file_clustering_pipeline(
+                jsonl_filename=args.input,
+                csv_filename=args.output,
+                min_sub_cluster_size=args.min_sub_cluster_size,
+                min_main_cluster_size=args.min_main_cluster_size
+            )
+        else:
+            # Run the hierarchical clustering pipeline
+            stats, engine = run_hierarchical_clustering_pipeline(
+                jsonl_filename=args.input,
+                csv_filename=args.output,
+                min_sub_cluster_size=args.min_sub_cluster_size,
+                min_main_cluster_size=args.min_main_cluster_size,
+                return_engine=True
+            )
     
-    if stats:
+    if stats and 'sub_clusters' in stats:
+        analysis_csv = args.output.replace('.csv', '_main_clusters_analysis.csv')
+        detailed_folder = args.output.replace('.csv', '_detailed_analysis')
+        
         print(f"\n{'='*60}")
         print("CLUSTERING COMPLETE")
         print(f"{'='*60}")
@@ -951,138 +1459,128 @@ Examples:
         print(f"{'='*60}")
         
         try:
-            # Get cluster statistics without printing
-            from querying import TFTQuery, load_clusters
             import csv
             
-            # Load cluster data
-            clusters = load_clusters(args.output)
-            if not clusters:
-                print("No cluster data found")
-            else:
-                # Get all main cluster IDs
-                main_cluster_ids = set()
-                for cluster_info in clusters.values():
-                    if cluster_info['main_cluster_id'] != -1:
-                        main_cluster_ids.add(cluster_info['main_cluster_id'])
-                
-                main_cluster_stats = []
-                
-                # Create clustering engine to access sub-cluster data
+            if engine is None:
+                # Database pipelines don't hand back their engine; cluster the input file
                 engine = TFTClusteringEngine()
                 engine.load_compositions(args.input)
+                engine.drop_raw_data()
                 engine.create_sub_clusters()
                 engine.create_main_clusters()
+            
+            # Stats for every main cluster straight from the clustered engine
+            cluster_stats = _main_cluster_stats(engine)
+            if not cluster_stats:
+                print("No cluster data found")
+            else:
+                main_cluster_stats = []
                 
-                # Calculate stats for each main cluster
-                for cluster_id in sorted(main_cluster_ids):
-                    query = TFTQuery(args.input, args.output)
-                    query.set_main_cluster(cluster_id)
-                    stats = query.get_stats()
+                for cluster_id in sorted(cluster_stats):
+                    stats = cluster_stats[cluster_id]
                     
-                    if stats['play_count'] > 0:
-                        # Get enhanced display with top units and prefixes
-                        enhanced_display = engine.get_enhanced_main_cluster_display(cluster_id)
-                        
-                        main_cluster_stats.append({
-                            'cluster_id': cluster_id,
-                            'size': stats['play_count'],
-                            'top_units': enhanced_display,
-                            'avg_place': stats['avg_placement'],
-                            'winrate': stats['winrate'],
-                            'top4_rate': stats['top4_rate'],
-                            'frequency': (stats['play_count'] / total_comps) * 100
-                        })
+                    # Get enhanced display with top units and prefixes
+                    enhanced_display = engine.get_enhanced_main_cluster_display(cluster_id)
+                    
+                    main_cluster_stats.append({
+                        'cluster_id': cluster_id,
+                        'size': stats['play_count'],
+                        'top_units': enhanced_display,
+                        'avg_place': stats['avg_placement'],
+                        'winrate': stats['winrate'],
+                        'top4_rate': stats['top4_rate'],
+                        'frequency': (stats['play_count'] / total_comps) * 100
+                    })
                 
                 # Sort by avg_place ascending (best placement first)
                 main_cluster_stats.sort(key=lambda x: x['avg_place'])
                 
-                # Export to CSV
-                csv_filename = args.output.replace('.csv', '_main_clusters_analysis.csv')
-                with open(csv_filename, 'w', newline='', encoding='utf-8') as csvfile:
-                    fieldnames = ['rank', 'cluster_id', 'size', f'top_{TOP_UNITS_COUNT}_units', 'avg_place', 'winrate', 'top4_rate', 'frequency']
-                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                    
-                    writer.writeheader()
-                    for i, cluster in enumerate(main_cluster_stats, 1):
-                        writer.writerow({
-                            'rank': i,
-                            'cluster_id': cluster['cluster_id'],
-                            'size': cluster['size'],
-                            f'top_{TOP_UNITS_COUNT}_units': cluster['top_units'],
-                            'avg_place': f"{cluster['avg_place']:.2f}",
-                            'winrate': f"{cluster['winrate']:.1f}%",
-                            'top4_rate': f"{cluster['top4_rate']:.1f}%",
-                            'frequency': f"{cluster['frequency']:.1f}%"
-                        })
-                
-                print(f"Exported {len(main_cluster_stats)} main clusters to: {csv_filename}")
-                
                 # Create folder for individual main cluster CSV files
-                import os
-                detailed_folder = args.output.replace('.csv', '_detailed_analysis')
                 os.makedirs(detailed_folder, exist_ok=True)
-                print(f"\nCreating detailed analysis in folder: {detailed_folder}")
+                print(f"Creating detailed analysis in folder: {detailed_folder}")
                 
-                # Export sub-cluster details for each main cluster
-                for cluster in main_cluster_stats:
-                    cluster_id = cluster['cluster_id']
-                    cluster_filename = os.path.join(detailed_folder, f"main_cluster_{cluster_id:02d}_subclusters.csv")
-                    
-                    # Get sub-clusters that belong to this main cluster
-                    main_cluster_sub_clusters = []
-                    for sub_cluster in engine.sub_clusters:
-                        if engine.main_cluster_assignments.get(sub_cluster.id) == cluster_id:
-                            main_cluster_sub_clusters.append(sub_cluster)
+                # Group sub-clusters by main cluster once rather than rescanning per cluster
+                sub_clusters_by_main = defaultdict(list)
+                for sub_cluster in engine.sub_clusters:
+                    main_cluster_id = engine.main_cluster_assignments.get(sub_cluster.id)
+                    if main_cluster_id is not None:
+                        sub_clusters_by_main[main_cluster_id].append(sub_cluster)
+                
+                # One pass writes the analysis rows and hands each main cluster's
+                # sub-cluster file to a writer thread, overlapping disk writes with formatting
+                with open(analysis_csv, 'w', newline='', encoding='utf-8') as csvfile, \
+                        ThreadPoolExecutor(max_workers=_EXPORT_WRITER_THREADS) as executor:
+                    writer = csv.writer(csvfile)
+                    writer.writerow(['rank', 'cluster_id', 'size', f'top_{TOP_UNITS_COUNT}_units', 'avg_place', 'winrate', 'top4_rate', 'frequency'])
                     
-                    # Write sub-cluster details to CSV
-                    with open(cluster_filename, 'w', newline='', encoding='utf-8') as subfile:
-                        subwriter = csv.DictWriter(subfile, fieldnames=[
-                            'sub_cluster_id', 'size', f'top_{TOP_UNITS_COUNT}_units', 'avg_place', 'winrate', 'top4_rate'
-                        ])
-                        subwriter.writeheader()
-                        
-                        # Sort sub-clusters by avg_place
-                        main_cluster_sub_clusters.sort(key=lambda x: x.avg_placement)
+                    writes = []
+                    for i, cluster in enumerate(main_cluster_stats, 1):
+                        cluster_id = cluster['cluster_id']
+                        writer.writerow((
+                            i,
+                            cluster_id,
+                            cluster['size'],
+                            cluster['top_units'],
+                            f"{cluster['avg_place']:.2f}",
+                            f"{cluster['winrate']:.1f}%",
+                            f"{cluster['top4_rate']:.1f}%",
+                            f"{cluster['frequency']:.1f}%"
+                        ))
                         
-                        for sub_cluster in main_cluster_sub_clusters:
-                            # Get enhanced display for sub-cluster
-                            enhanced_sub_display = engine.get_enhanced_sub_cluster_display(sub_cluster.id)
-                            
-                            subwriter.writerow({
-                                'sub_cluster_id': sub_cluster.id,
-                                'size': sub_cluster.size,
-                                f'top_{TOP_UNITS_COUNT}_units': enhanced_sub_display,
-                                'avg_place': f"{sub_cluster.avg_placement:.2f}",
-                                'winrate': f"{sub_cluster.winrate:.1f}%",
-                                'top4_rate': f"{sub_cluster.top4_rate:.1f}%"
-                            })
+                        # Sub-clusters of this main cluster, sorted by avg_place, with enhanced displays
+                        main_cluster_sub_clusters = sorted(sub_clusters_by_main[cluster_id], key=lambda x: x.avg_placement)
+                        sub_rows = [
+                            (
+                                sub_cluster.id,
+                                sub_cluster.size,
+                                engine.get_enhanced_sub_cluster_display(sub_cluster.id),
+                                f"{sub_cluster.avg_placement:.2f}",
+                                f"{sub_cluster.winrate:.1f}%",
+                                f"{sub_cluster.top4_rate:.1f}%"
+                            )
+                            for sub_cluster in main_cluster_sub_clusters
+                        ]
+                        cluster_filename = os.path.join(detailed_folder, f"main_cluster_{cluster_id:02d}_subclusters.csv")
+                        writes.append(executor.submit(_write_sub_cluster_csv, cluster_filename, sub_rows))
+                    
+                    # Surface any failed write
+                    for write in writes:
+                        write.result()
                 
-                print(f"\nTop 5 Main Clusters (by avg placement):")
-                print(f"Top {TOP_UNITS_COUNT} units by frequency - Carry ≥{int(CARRY_THRESHOLD*100)}%, g3star ≥{int(GOLD_3STAR_THRESHOLD*100)}%, s3star ≥{int(SILVER_3STAR_THRESHOLD*100)}%:")
-                print(f"{'Rank':<4} {'ID':<4} {'Size':<6} {'Avg Place':<10} {'Winrate':<9} {'Top4':<8} {'Top Units'}")
-                print(f"{'-'*120}")
+                print(f"Exported {len(main_cluster_stats)} main clusters to: {analysis_csv}")
+                
+                # Build the whole table, then write it in one call
+                lines = [
+                    f"\nTop 5 Main Clusters (by avg placement):",
+                    f"Top {TOP_UNITS_COUNT} units by frequency - Carry ≥{_CARRY_PCT}%, g3star ≥{_GOLD_3STAR_PCT}%, s3star ≥{_SILVER_3STAR_PCT}%:",
+                    f"{'Rank':<4} {'ID':<4} {'Size':<6} {'Avg Place':<10} {'Winrate':<9} {'Top4':<8} {'Top Units'}",
+                    f"{'-'*120}"
+                ]
                 for i, cluster in enumerate(main_cluster_stats[:5], 1):
                     units_short = cluster['top_units'][:80] + "..." if len(cluster['top_units']) > 80 else cluster['top_units']
                     avg_place_display = f"{cluster['avg_place']:.2f}"
                     winrate_display = f"{cluster['winrate']:.1f}%"
                     top4_display = f"{cluster['top4_rate']:.1f}%"
-                    print(f"{i:<4} {cluster['cluster_id']:<4} {cluster['size']:<6} {avg_place_display:<10} {winrate_display:<9} {top4_display:<8} {units_short}")
+                    lines.append(f"{i:<4} {cluster['cluster_id']:<4} {cluster['size']:<6} {avg_place_display:<10} {winrate_display:<9} {top4_display:<8} {units_short}")
+                sys.stdout.write('\n'.join(lines) + '\n')
                 
         except Exception as e:
             print(f"Error creating main clusters analysis: {e}")
             import traceback
             traceback.print_exc()
         
-        print(f"\nFiles generated:")
-        print(f"  - {args.output}: Cluster assignments")
-        csv_analysis_file = args.output.replace('.csv', '_main_clusters_analysis.csv')
-        print(f"  - {csv_analysis_file}: Main clusters analysis (CSV)")
-        detailed_folder = args.output.replace('.csv', '_detailed_analysis')
-        print(f"  - {detailed_folder}/: Individual CSV files for each main cluster's sub-clusters")
-        print(f"\nNext steps:")
-        print(f"  - Run querying: python querying.py --input {args.input} --clusters {args.output}")
-        print(f"  - Open {csv_analysis_file} in Excel/spreadsheet for detailed analysis")
-        print(f"  - Explore individual main cluster details in {detailed_folder}/ folder")
+        sys.stdout.write(
+            f"\nFiles generated:\n"
+            f"  - {args.output}: Cluster assignments\n"
+            f"  - {analysis_csv}: Main clusters analysis (CSV)\n"
+            f"  - {detailed_folder}/: Individual CSV files for each main cluster's sub-clusters\n"
+            f"\nNext steps:\n"
+            f"  - Run querying: python querying.py --input {args.input} --clusters {args.output}\n"
+            f"  - Open {analysis_csv} in Excel/spreadsheet for detailed analysis\n"
+            f"  - Explore individual main cluster details in {detailed_folder}/ folder\n"
+        )
+    elif stats and 'message' in stats:
+        # Incremental runs: nothing new, or new rows appended without a full re-analysis
+        print(f"\n{stats['message']}")
     else:
         print("\nClustering failed!")
\ No newline at end of file
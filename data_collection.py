@@ -28,19 +28,55 @@ ENABLE_JSONL_BACKUP = False    # Also save to JSONL file as backup
 DB_BATCH_SIZE = 25             # Database batch size (smaller for stability)
 ENABLE_DB_VALIDATION = True    # Validate data before database insertion
 
+# Tracker settings
+PROGRESS_SAVE_INTERVAL = 30    # Minimum seconds between progress file checkpoints
+GLOBAL_TRACKER_FILE = 'global_matches_downloaded.txt'  # Append-only log, one match id per line
+LEGACY_GLOBAL_TRACKER_FILE = 'global_matches_downloaded.json'  # Migrated on first load
+
 # ===============================
 # END CONFIGURATION
 # ===============================
 
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import json
 import threading
 import os
+import random
+import re
 from datetime import datetime
 from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# orjson decodes the large match-detail payloads several times faster than stdlib json
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj, indent=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj, indent=False):
+        if indent:
+            return json.dumps(obj, indent=2).encode('utf-8')
+        # Compact like orjson: smaller JSONL records and less serializer work
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+# HTTP/2 lets concurrent match fetches share one TLS connection per regional host;
+# requires `pip install httpx[http2]`, otherwise a pooled requests.Session is used
+try:
+    import httpx
+    import h2  # noqa: F401 - httpx only negotiates HTTP/2 when h2 is installed
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Database imports
 try:
     from database.data_import import MatchDataImporter, batch_insert_matches, check_match_exists
@@ -61,39 +97,46 @@ class RateLimiter:
         self.max_per_second = max_per_second
         self.max_per_window = max_per_window
         self.window_seconds = window_seconds
-        self.second_requests = deque()
-        self.window_requests = deque()
+        # Only the newest max_per_* timestamps matter, so appends evict expired ones
+        self.second_requests = deque(maxlen=max_per_second)
+        self.window_requests = deque(maxlen=max_per_window)
         self.lock = threading.Lock()
 
     def wait_if_needed(self):
-        """Wait if necessary to respect rate limits."""
-        with self.lock:
-            while True:
-                now = time.time()
-                # Clean window
-                while self.window_requests and self.window_requests[0] < now - self.window_seconds:
-                    self.window_requests.popleft()
-                # Check window
-                if len(self.window_requests) >= self.max_per_window:
+        """
+        Wait until both rate limits allow a request, then reserve its slot.
+        
+        The lock only guards the deque bookkeeping; threads that must wait
+        sleep outside it, so one sleeping worker never blocks the others.
+        Uses the monotonic clock so wall-clock adjustments cannot cause bursts.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                # A full deque whose oldest entry is still inside its period means the limit is hit
+                sleep_time = 0.0
+                if len(self.window_requests) == self.max_per_window:
                     sleep_time = self.window_requests[0] + self.window_seconds - now + 0.01
-                    time.sleep(sleep_time)
-                    continue
-                # Clean second
-                while self.second_requests and self.second_requests[0] < now - 1:
-                    self.second_requests.popleft()
-                # Check second
-                if len(self.second_requests) >= self.max_per_second:
-                    sleep_time = self.second_requests[0] + 1 - now + 0.01
-                    time.sleep(sleep_time)
-                    continue
-                break
+                if len(self.second_requests) == self.max_per_second:
+                    sleep_time = max(sleep_time, self.second_requests[0] + 1 - now + 0.01)
+                
+                if sleep_time <= 0:
+                    # Reserve the slot before releasing the lock
+                    self.window_requests.append(now)
+                    self.second_requests.append(now)
+                    return
+            time.sleep(sleep_time)
+
+
+# (connect, read) timeout in seconds for Riot API requests
+REQUEST_TIMEOUT = (3.05, 10)
 
-    def record_request(self):
-        """Record that a request was made."""
-        with self.lock:
-            now = time.time()
-            self.window_requests.append(now)
-            self.second_requests.append(now)
+# Transient failures (server errors, dropped connections, timeouts) are retried
+# with jittered exponential backoff before giving up on a request
+MAX_REQUEST_ATTEMPTS = 5
+MAX_BACKOFF_SECONDS = 30
+_RETRY_STATUSES = frozenset({500, 502, 503, 504})
+_TRANSIENT_ERRORS = (requests.RequestException,) + ((httpx.TransportError,) if HTTP2_AVAILABLE else ())
 
 
 class RiotAPIClient:
@@ -105,17 +148,59 @@ class RiotAPIClient:
     def __init__(self, api_key, max_per_second=20, max_per_window=100, window_seconds=120):
         self.api_key = api_key
         self.limiter = RateLimiter(max_per_second, max_per_window, window_seconds)
-    
+        
+        # Key travels as a header rather than in every URL
+        if HTTP2_AVAILABLE:
+            # In-flight requests multiplex as streams over one connection per host
+            self.session = httpx.Client(
+                http2=True,
+                headers={'X-Riot-Token': api_key},
+                limits=httpx.Limits(max_connections=max_per_second * 2,
+                                    max_keepalive_connections=max_per_second * 2),
+            )
+            self.request_timeout = httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0])
+        else:
+            # One pooled session so requests to the same regional host reuse keep-alive
+            # connections instead of a new TCP + TLS handshake per call
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_per_second * 2, max_retries=0)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.session.headers['X-Riot-Token'] = api_key
+            self.request_timeout = REQUEST_TIMEOUT
+    
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _api_get(self, url):
         """Make a rate-limited API request with retry logic."""
+        attempt = 0
         while True:
             self.limiter.wait_if_needed()
-            resp = requests.get(url)
-            if resp.status_code != 429:
-                self.limiter.record_request()
-                return resp
-            retry_after = int(resp.headers.get('Retry-After', '10'))
-            time.sleep(retry_after)
+            try:
+                resp = self.session.get(url, timeout=self.request_timeout)
+            except _TRANSIENT_ERRORS:
+                attempt += 1
+                if attempt >= MAX_REQUEST_ATTEMPTS:
+                    raise
+                time.sleep(min(2 ** (attempt - 1) + random.random(), MAX_BACKOFF_SECONDS))
+                continue
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get('Retry-After', '10'))
+                time.sleep(retry_after)
+                continue
+            if resp.status_code in _RETRY_STATUSES and attempt + 1 < MAX_REQUEST_ATTEMPTS:
+                attempt += 1
+                time.sleep(min(2 ** (attempt - 1) + random.random(), MAX_BACKOFF_SECONDS))
+                continue
+            return resp
     
     def get_puuid(self, summoner_name, tag_line, region):
         """
@@ -128,12 +213,12 @@ class RiotAPIClient:
         """
         api_url = (
             f"https://{region}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/"
-            f"{summoner_name}/{tag_line}?api_key={self.api_key}"
+            f"{summoner_name}/{tag_line}"
         )
         
         resp = self._api_get(api_url)
         if resp.status_code == 200:
-            player_info = resp.json()
+            player_info = _json_loads(resp.content)
             return player_info['puuid']
         else:
             raise Exception(f"Failed to get PUUID: {resp.status_code} - {resp.text}")
@@ -150,12 +235,12 @@ class RiotAPIClient:
         """
         api_url = (
             f"https://{region}.api.riotgames.com/tft/match/v1/matches/by-puuid/"
-            f"{puuid}/ids?start={start}&count={count}&api_key={self.api_key}"
+            f"{puuid}/ids?start={start}&count={count}"
         )
         
         resp = self._api_get(api_url)
         if resp.status_code == 200:
-            return resp.json()
+            return _json_loads(resp.content)
         else:
             raise Exception(f"Failed to get match IDs: {resp.status_code} - {resp.text}")
 
@@ -171,12 +256,12 @@ class RiotAPIClient:
         """
         api_url = (
             f"https://{region}.api.riotgames.com/tft/match/v1/matches/by-puuid/"
-            f"{puuid}/ids?endTime={end_time}&startTime={start_time}&api_key={self.api_key}"
+            f"{puuid}/ids?endTime={end_time}&startTime={start_time}"
         )
         
         resp = self._api_get(api_url)
         if resp.status_code == 200:
-            return resp.json()
+            return _json_loads(resp.content)
         else:
             raise Exception(f"Failed to get period match IDs: {resp.status_code} - {resp.text}")
 
@@ -190,12 +275,12 @@ class RiotAPIClient:
         """
         api_url = (
             f"https://{region}.api.riotgames.com/tft/match/v1/matches/"
-            f"{match_id}?api_key={self.api_key}"
+            f"{match_id}"
         )
         
         resp = self._api_get(api_url)
         if resp.status_code == 200:
-            return resp.json()
+            return _json_loads(resp.content)
         else:
             raise Exception(f"Failed to get match details: {resp.status_code} - {resp.text}")
 
@@ -209,12 +294,12 @@ class RiotAPIClient:
         """
         api_url = (
             f"https://{region}.api.riotgames.com/tft/league/v1/by-puuid/"
-            f"{puuid}?api_key={self.api_key}"
+            f"{puuid}"
         )
         
         resp = self._api_get(api_url)
         if resp.status_code == 200:
-            return resp.json()
+            return _json_loads(resp.content)
         else:
             raise Exception(f"Failed to get league info: {resp.status_code} - {resp.text}")
 
@@ -241,14 +326,14 @@ class RiotAPIClient:
         while True:
             api_url = (
                 f"https://{region}.api.riotgames.com/tft/league/v1/entries/"
-                f"{tier}/{division}?queue={queue}&page={page}&api_key={self.api_key}"
+                f"{tier}/{division}?queue={queue}&page={page}"
             )
             
             resp = self._api_get(api_url)
             if resp.status_code != 200:
                 break
                 
-            resp_list = resp.json()
+            resp_list = _json_loads(resp.content)
             if not resp_list:
                 break
                 
@@ -261,12 +346,12 @@ class RiotAPIClient:
         """Helper function to get players list for high tiers (no pagination needed)."""
         api_url = (
             f"https://{region}.api.riotgames.com/tft/league/v1/"
-            f"{tier}?queue={queue}&api_key={self.api_key}"
+            f"{tier}?queue={queue}"
         )
         
         resp = self._api_get(api_url)
         if resp.status_code == 200:
-            return resp.json()
+            return _json_loads(resp.content)
         else:
             raise Exception(f"Failed to get high tier players: {resp.status_code} - {resp.text}")
 
@@ -292,21 +377,30 @@ class RiotAPIClient:
         tier_index = tiers.index(tier)
         div_index = divisions.index(division) if tier not in ['MASTER', 'GRANDMASTER', 'CHALLENGER'] else 0
         
-        players_list = []
-        
+        # Every (tier, division) league query up front; apex tiers have a single list
+        specs = []
         for t in tiers[tier_index:]:
             if t in ['MASTER', 'GRANDMASTER', 'CHALLENGER']:
-                high_tier_data = self.get_players_list(region=region, tier=t.lower(), queue=queue)
-                players_list.extend(high_tier_data['entries'])
-                print(f"Retrieved players for tier: {t.lower()}")
+                specs.append((t.lower(), 'I'))
             else:
                 # For lower tiers, get all divisions from current up to I
                 start_div = div_index if t == tier else 3  # Start from IV for subsequent tiers
-                for div_idx in range(start_div, -1, -1):
-                    players_list.extend(self.get_players_list(
-                        region=region, tier=t.lower(), division=divisions[div_idx], queue=queue
-                    ))
-                    print(f"Retrieved players for tier: {t} division: {divisions[div_idx]}")
+                specs.extend((t.lower(), divisions[div_idx]) for div_idx in range(start_div, -1, -1))
+        
+        # Divisions page independently, so scan them concurrently under the rate limiter
+        with ThreadPoolExecutor(max_workers=self.limiter.max_per_second) as executor:
+            results = executor.map(
+                lambda spec: self.get_players_list(region=region, tier=spec[0], division=spec[1], queue=queue),
+                specs
+            )
+            players_list = []
+            for (t, div), result in zip(specs, results):
+                if t in ['master', 'grandmaster', 'challenger']:
+                    players_list.extend(result['entries'])
+                    print(f"Retrieved players for tier: {t}")
+                else:
+                    players_list.extend(result)
+                    print(f"Retrieved players for tier: {t.upper()} division: {div}")
                 
         return players_list
 
@@ -325,18 +419,24 @@ class RiotAPIClient:
             tier=tier, region=region_players, division=division, queue=queue
         )
         
-        match_ids = []
-        for player in players_list:
-            puuid = player['puuid']
-            try:
-                player_match_ids = self.get_last_match_ids(puuid=puuid, region=region_matches)
-                match_ids.extend(player_match_ids)
-            except Exception as e:
-                print(f"Error getting matches for player {puuid}: {e}")
-                continue
+        # A player promoted mid-crawl can appear on two league pages; fetch each history once
+        puuids = dict.fromkeys(player['puuid'] for player in players_list)
         
-        # Remove duplicates
-        return list(set(match_ids))
+        # Histories are independent, so overlap their round trips up to the rate limit;
+        # results are merged in player order so each history stays newest-first
+        match_ids = {}
+        with ThreadPoolExecutor(max_workers=self.limiter.max_per_second) as executor:
+            futures = [
+                (puuid, executor.submit(self.get_last_match_ids, puuid=puuid, region=region_matches))
+                for puuid in puuids
+            ]
+            for puuid, future in futures:
+                try:
+                    match_ids.update(dict.fromkeys(future.result()))
+                except Exception as e:
+                    print(f"Error getting matches for player {puuid}: {e}")
+        
+        return list(match_ids)
 
 
 # Set detection logic removed - use manual timestamp instead
@@ -345,6 +445,11 @@ class RiotAPIClient:
 # Set detection data loading removed - use manual timestamp instead
 
 
+# First "match_id" in a raw match line is metadata.match_id
+_MATCH_ID_RE = re.compile(rb'"match_id"\s*:\s*"([^"]+)"')
+_SCAN_BUFFER_SIZE = 1 << 20
+
+
 def initialize_global_tracker_from_existing_data(jsonl_files=None):
     """
     Initialize the global match tracker from existing JSONL files.
@@ -374,16 +479,15 @@ def initialize_global_tracker_from_existing_data(jsonl_files=None):
         file_matches = set()
         
         try:
-            with open(jsonl_file, 'r', encoding='utf-8') as f:
+            with open(jsonl_file, 'rb', buffering=_SCAN_BUFFER_SIZE) as f:
                 for line_num, line in enumerate(f, 1):
                     if line.strip():
-                        try:
-                            match = json.loads(line.strip())
-                            match_id = match['metadata']['match_id']
-                            file_matches.add(match_id)
-                        except (KeyError, json.JSONDecodeError) as e:
-                            print(f"     Warning: Invalid match data at line {line_num}: {e}")
+                        # Only the match id is needed, so skip parsing the whole match
+                        found = _MATCH_ID_RE.search(line)
+                        if found is None:
+                            print(f"     Warning: Invalid match data at line {line_num}: no match_id")
                             continue
+                        file_matches.add(found.group(1).decode('utf-8'))
             
             print(f"     Found {len(file_matches)} matches in {jsonl_file}")
             global_tracker.mark_downloaded(list(file_matches))
@@ -409,10 +513,11 @@ def initialize_global_tracker_from_existing_data(jsonl_files=None):
 class GlobalMatchTracker:
     """Global tracker for all downloaded matches to prevent duplicates across all sessions."""
     
-    def __init__(self, tracker_file='global_matches_downloaded.json', use_database=USE_DATABASE):
+    def __init__(self, tracker_file=GLOBAL_TRACKER_FILE, use_database=USE_DATABASE):
         self.tracker_file = tracker_file
         self.use_database = use_database and DATABASE_AVAILABLE
         self.downloaded_matches = set()
+        self._pending_writes = []  # ids marked since the last save_tracker
         self.db_importer = None
         
         if self.use_database:
@@ -428,27 +533,32 @@ class GlobalMatchTracker:
     
     def load_tracker(self):
         """Load the global match tracker from file."""
-        if os.path.exists(self.tracker_file):
-            try:
+        try:
+            if os.path.exists(self.tracker_file):
                 with open(self.tracker_file, 'r', encoding='utf-8') as f:
+                    self.downloaded_matches = set(f.read().splitlines())
+                self.downloaded_matches.discard('')
+            elif os.path.exists(LEGACY_GLOBAL_TRACKER_FILE):
+                # One-time migration from the old JSON tracker; the first save writes the log
+                with open(LEGACY_GLOBAL_TRACKER_FILE, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.downloaded_matches = set(data.get('downloaded_matches', []))
-                print(f"   Loaded global match tracker: {len(self.downloaded_matches)} matches already downloaded")
-            except Exception as e:
-                print(f"   Warning: Could not load global match tracker: {e}")
-                self.downloaded_matches = set()
+                self.downloaded_matches = set(data.get('downloaded_matches', []))
+                self._pending_writes = list(self.downloaded_matches)
+            else:
+                return
+            print(f"   Loaded global match tracker: {len(self.downloaded_matches)} matches already downloaded")
+        except Exception as e:
+            print(f"   Warning: Could not load global match tracker: {e}")
+            self.downloaded_matches = set()
+            self._pending_writes = []
     
     def save_tracker(self):
-        """Save the global match tracker to file (if not using database)."""
-        if not self.use_database:
+        """Append newly downloaded match ids to the tracker file (if not using database)."""
+        if not self.use_database and self._pending_writes:
             try:
-                data = {
-                    'downloaded_matches': list(self.downloaded_matches),
-                    'last_updated': time.time(),
-                    'total_matches': len(self.downloaded_matches)
-                }
-                with open(self.tracker_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2)
+                with open(self.tracker_file, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(self._pending_writes) + '\n')
+                self._pending_writes = []
             except Exception as e:
                 print(f"   Warning: Could not save global match tracker: {e}")
     
@@ -463,6 +573,18 @@ class GlobalMatchTracker:
         else:
             return match_id in self.downloaded_matches
     
+    def filter_new(self, match_ids):
+        """Return the match ids not yet downloaded, in order, with one lookup for the batch."""
+        if self.use_database:
+            try:
+                existing = self.db_importer.get_existing_match_ids(match_ids)
+            except Exception as e:
+                print(f"   Warning: Database check failed, using local cache: {e}")
+                existing = self.downloaded_matches
+        else:
+            existing = self.downloaded_matches
+        return [mid for mid in match_ids if mid not in existing]
+    
     def mark_downloaded(self, match_ids):
         """Mark matches as downloaded."""
         if isinstance(match_ids, str):
@@ -471,12 +593,13 @@ class GlobalMatchTracker:
         if self.use_database:
             # For database mode, matches are marked downloaded when inserted
             # This method is mainly for compatibility
-            new_matches = [mid for mid in match_ids if mid not in self.downloaded_matches]
-            self.downloaded_matches.update(new_matches)  # Keep local cache for session
+            new_matches = set(match_ids).difference(self.downloaded_matches)
+            self.downloaded_matches |= new_matches  # Keep local cache for session
             return len(new_matches)
         else:
-            new_matches = [mid for mid in match_ids if mid not in self.downloaded_matches]
-            self.downloaded_matches.update(new_matches)
+            new_matches = set(match_ids).difference(self.downloaded_matches)
+            self.downloaded_matches |= new_matches
+            self._pending_writes.extend(new_matches)
             return len(new_matches)
     
     def get_stats(self):
@@ -517,8 +640,11 @@ class SetBasedCollectionProgress:
         self.matches_inserted = 0  # New: track successful database insertions
         self.matches_duplicate = 0  # New: track duplicates
         self.matches_errors = 0  # New: track errors
+        self._last_save = float('-inf')  # monotonic time of the last progress checkpoint
         self.use_database = use_database and DATABASE_AVAILABLE
         self.global_tracker = global_tracker or GlobalMatchTracker(use_database=use_database)
+        # File-mode tracker lookups are plain set membership; keep the set at hand
+        self._global_set = None if self.global_tracker.use_database else self.global_tracker.downloaded_matches
         
         # Database-specific tracking
         if self.use_database:
@@ -547,8 +673,8 @@ class SetBasedCollectionProgress:
     def add_processed_matches(self, match_ids):
         """Mark matches as processed and update global tracker."""
         # Update session tracking
-        new_matches = [mid for mid in match_ids if mid not in self.processed_matches]
-        self.processed_matches.update(new_matches)
+        new_matches = set(match_ids).difference(self.processed_matches)
+        self.processed_matches |= new_matches
         
         # Update global tracking
         global_new = self.global_tracker.mark_downloaded(match_ids)
@@ -562,14 +688,30 @@ class SetBasedCollectionProgress:
     
     def is_match_processed(self, match_id):
         """Check if match has been processed (checks both session and global)."""
-        return match_id in self.processed_matches or self.global_tracker.is_downloaded(match_id)
+        if match_id in self.processed_matches:
+            return True
+        if self._global_set is not None:
+            return match_id in self._global_set
+        return self.global_tracker.is_downloaded(match_id)
     
     def is_match_downloaded_globally(self, match_id):
         """Check if match has been downloaded in any previous session."""
+        if self._global_set is not None:
+            return match_id in self._global_set
         return self.global_tracker.is_downloaded(match_id)
     
-    def save_progress(self):
-        """Save current progress to file and update global tracker."""
+    def save_progress(self, force=False):
+        """
+        Save current progress to file and update global tracker.
+        
+        Checkpoints are throttled to one per PROGRESS_SAVE_INTERVAL seconds unless
+        force is set, and written to a temp file then swapped in atomically.
+        """
+        # The tracker log is append-only, so flushing it every call is cheap
+        self.global_tracker.save_tracker()
+        now = time.monotonic()
+        if not force and now - self._last_save < PROGRESS_SAVE_INTERVAL:
+            return
         try:
             data = {
                 'processed_players': list(self.processed_players),
@@ -577,11 +719,11 @@ class SetBasedCollectionProgress:
                 'matches_collected': self.matches_collected,
                 'timestamp': time.time()
             }
-            with open(self.progress_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            
-            # Save global tracker
-            self.global_tracker.save_tracker()
+            tmp_file = self.progress_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(_json_dumps(data, indent=True))
+            os.replace(tmp_file, self.progress_file)
+            self._last_save = now
         except Exception as e:
             print(f"   Warning: Could not save progress: {e}")
     
@@ -594,16 +736,31 @@ class SetBasedCollectionProgress:
         duplicates = 0
         errors = 0
         
+        # Validate data before insertion if enabled
+        if ENABLE_DB_VALIDATION:
+            valid_matches = []
+            for match_data in matches_data:
+                is_valid, validation_errors = self.db_importer.validate_match_data(match_data)
+                if is_valid:
+                    valid_matches.append(match_data)
+                else:
+                    print(f"     Validation failed: {', '.join(validation_errors)}")
+                    errors += 1
+            matches_data = valid_matches
+        
+        # One round-trip per table for the whole batch; on failure fall back to
+        # per-match inserts so one bad match does not cost the others
+        try:
+            bulk_inserted, bulk_duplicates, bulk_errors = self.db_importer.insert_matches_bulk(matches_data)
+            inserted += bulk_inserted
+            duplicates += bulk_duplicates
+            errors += bulk_errors
+            matches_data = []
+        except Exception as e:
+            print(f"     Bulk insert failed, inserting matches one by one: {e}")
+        
         for match_data in matches_data:
             try:
-                # Validate data before insertion if enabled
-                if ENABLE_DB_VALIDATION:
-                    is_valid, validation_errors = self.db_importer.validate_match_data(match_data)
-                    if not is_valid:
-                        print(f"     Validation failed: {', '.join(validation_errors)}")
-                        errors += 1
-                        continue
-                
                 # Insert match data
                 success, message = self.db_importer.insert_match_data(match_data)
                 
@@ -711,81 +868,111 @@ def collect_period_match_data(api_key, start_timestamp, tier='CHALLENGER',
     print(f"\n=== COLLECTING PERIOD MATCHES ===")
     current_time = int(time.time())
     
-    for i, player in enumerate(remaining_players, 1):
-        puuid = player['puuid']
-        player_name = player.get('summonerName', f'Player_{i}')
+    # Fetch match histories a few players ahead on a small pool, so their round
+    # trips overlap with the match-detail batches of the current player
+    def fetch_history(player):
+        return client.get_period_match_ids(
+            player['puuid'], region_matches, period_start_timestamp, current_time
+        )
+    
+    # Detail fetches share one pool across every player and batch instead of a new one per batch
+    with ThreadPoolExecutor(max_workers=max_workers) as history_executor, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        players_ahead = iter(remaining_players)
+        pending_histories = deque()
+        
+        def submit_next_history():
+            player = next(players_ahead, None)
+            if player is not None:
+                pending_histories.append(history_executor.submit(fetch_history, player))
         
-        print(f"\nPlayer {i}/{len(remaining_players)}: {player_name}")
+        for _ in range(2 * max_workers):
+            submit_next_history()
         
         try:
-            # Get all matches for this player within the period timeframe
-            player_match_ids = client.get_period_match_ids(
-                puuid, region_matches, period_start_timestamp, current_time
-            )
-            
-            print(f"   Found {len(player_match_ids)} matches in period timeframe")
-            
-            # Filter out already processed matches (including globally downloaded ones)
-            session_new = [mid for mid in player_match_ids if not progress.is_match_processed(mid)]
-            globally_downloaded = [mid for mid in player_match_ids if progress.is_match_downloaded_globally(mid)]
-            
-            print(f"   Already downloaded globally: {len(globally_downloaded)}")
-            print(f"   New matches to collect: {len(session_new)}")
-            
-            new_match_ids = session_new
-            
-            if new_match_ids:
-                # Process matches in batches
-                for batch_start in range(0, len(new_match_ids), batch_size):
-                    batch_ids = new_match_ids[batch_start:batch_start + batch_size]
+            for i, player in enumerate(remaining_players, 1):
+                puuid = player['puuid']
+                player_name = player.get('summonerName', f'Player_{i}')
+                
+                print(f"\nPlayer {i}/{len(remaining_players)}: {player_name}")
+                
+                # Take this player's prefetched history and queue the next player's
+                history = pending_histories.popleft()
+                submit_next_history()
+                
+                try:
+                    # Get all matches for this player within the period timeframe
+                    player_match_ids = history.result()
                     
-                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                        future_to_match = {
-                            executor.submit(client.get_match_details, match_id, region_matches): match_id 
-                            for match_id in batch_ids
-                        }
-                        
-                        batch_details = []
-                        valid_matches = []
-                        
-                        for future in as_completed(future_to_match):
-                            try:
-                                match_details = future.result()
-                                match_id = future_to_match[future]
-                                
-                                # Add collection metadata
-                                match_details['collection_info'] = {
-                                    'start_timestamp': period_start_timestamp,
-                                    'collection_timestamp': current_time
-                                }
-                                batch_details.append(match_details)
-                                valid_matches.append(match_id)
+                    print(f"   Found {len(player_match_ids)} matches in period timeframe")
+                    
+                    # Filter out already processed matches (including globally downloaded ones)
+                    globally_new = progress.global_tracker.filter_new(player_match_ids)
+                    session_new = [mid for mid in globally_new if mid not in progress.processed_matches]
+                    
+                    print(f"   Already downloaded globally: {len(player_match_ids) - len(globally_new)}")
+                    print(f"   New matches to collect: {len(session_new)}")
+                    
+                    new_match_ids = session_new
+                    
+                    if new_match_ids:
+                        # Process matches in batches
+                        for batch_start in range(0, len(new_match_ids), batch_size):
+                            batch_ids = new_match_ids[batch_start:batch_start + batch_size]
+                            
+                            future_to_match = {
+                                executor.submit(client.get_match_details, match_id, region_matches): match_id 
+                                for match_id in batch_ids
+                            }
+                            
+                            batch_details = []
+                            valid_matches = []
+                            
+                            for future in as_completed(future_to_match):
+                                try:
+                                    match_details = future.result()
+                                    match_id = future_to_match[future]
                                     
-                            except Exception as e:
-                                match_id = future_to_match[future]
-                                print(f"     Error fetching {match_id}: {e}")
-                        
-                        # Store batch data (database and/or file)
-                        if batch_details:
-                            inserted, duplicates, errors = store_matches_data(
-                                batch_details, progress, output_file, USE_DATABASE
-                            )
-                            new_count = progress.add_processed_matches(valid_matches)
+                                    # Add collection metadata
+                                    match_details['collection_info'] = {
+                                        'start_timestamp': period_start_timestamp,
+                                        'collection_timestamp': current_time
+                                    }
+                                    batch_details.append(match_details)
+                                    valid_matches.append(match_id)
+                                        
+                                except Exception as e:
+                                    match_id = future_to_match[future]
+                                    print(f"     Error fetching {match_id}: {e}")
                             
-                            if USE_DATABASE and DATABASE_AVAILABLE:
-                                print(f"     Stored {len(batch_details)} matches: {inserted} inserted, {duplicates} duplicates, {errors} errors ({new_count} session new)")
-                            else:
-                                print(f"     Saved {len(batch_details)} valid matches ({new_count} new)")
-            
-            # Mark player as processed
-            progress.add_processed_player(puuid)
-            progress.save_progress()
-            progress.print_progress()
-            
-        except Exception as e:
-            print(f"   Error processing player {puuid}: {e}")
-            continue
-    
+                            # Store batch data (database and/or file)
+                            if batch_details:
+                                inserted, duplicates, errors = store_matches_data(
+                                    batch_details, progress, output_file, USE_DATABASE
+                                )
+                                new_count = progress.add_processed_matches(valid_matches)
+                                
+                                if USE_DATABASE and DATABASE_AVAILABLE:
+                                    print(f"     Stored {len(batch_details)} matches: {inserted} inserted, {duplicates} duplicates, {errors} errors ({new_count} session new)")
+                                else:
+                                    print(f"     Saved {len(batch_details)} valid matches ({new_count} new)")
+                    
+                    # Mark player as processed
+                    progress.add_processed_player(puuid)
+                    progress.save_progress()
+                    progress.print_progress()
+                    
+                except Exception as e:
+                    print(f"   Error processing player {puuid}: {e}")
+                    continue
+        finally:
+            # Drop queued history/detail fetches so an interrupted run only waits
+            # for requests already in flight when the pools are closed
+            history_executor.shutdown(wait=False, cancel_futures=True)
+            executor.shutdown(wait=False, cancel_futures=True)
+            # Checkpoint whatever the throttled saves have not written yet
+            progress.save_progress(force=True)
+        
     # Final summary
     print(f"\n{'='*60}")
     print("PERIOD-BASED DATA COLLECTION COMPLETE")
@@ -812,10 +999,10 @@ def append_to_jsonl(filename, matches):
     :param filename: Path to the JSONL file
     :param matches: List of match dictionaries to append
     """
-    with open(filename, 'a') as f:
-        for match in matches:
-            json.dump(match, f)
-            f.write('\n')
+    # Serialize the whole batch up front and hand it to the kernel in one write
+    payload = b''.join(_json_dumps(match) + b'\n' for match in matches)
+    with open(filename, 'ab') as f:
+        f.write(payload)
 
 
 def store_matches_data(matches, progress=None, output_file=None, use_database=USE_DATABASE):
@@ -905,7 +1092,7 @@ def collect_match_data(api_key, tier='CHALLENGER', region_matches='sea', region_
     print(f"   Found {len(all_match_ids)} unique matches")
     
     # Filter out already downloaded matches
-    new_match_ids = [mid for mid in all_match_ids if not global_tracker.is_downloaded(mid)]
+    new_match_ids = global_tracker.filter_new(all_match_ids)
     already_downloaded = len(all_match_ids) - len(new_match_ids)
     
     print(f"   Already downloaded: {already_downloaded} matches")
@@ -921,40 +1108,42 @@ def collect_match_data(api_key, tier='CHALLENGER', region_matches='sea', region_
     print(f"2. Fetching match details (batch size: {batch_size}, workers: {max_workers})...")
     total_batches = (len(match_ids) + batch_size - 1) // batch_size
     
-    for batch_num, i in enumerate(range(0, len(match_ids), batch_size), 1):
-        batch_ids = match_ids[i:i + batch_size]
-        print(f"   Processing batch {batch_num}/{total_batches} ({len(batch_ids)} matches)")
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    # One pool for every batch instead of spawning and joining threads per batch
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch_num, i in enumerate(range(0, len(match_ids), batch_size), 1):
+            batch_ids = match_ids[i:i + batch_size]
+            print(f"   Processing batch {batch_num}/{total_batches} ({len(batch_ids)} matches)")
+            
             future_to_match = {
                 executor.submit(client.get_match_details, match_id, region_matches): match_id 
                 for match_id in batch_ids
             }
             
             batch_details = []
+            successful_match_ids = []
             for future in as_completed(future_to_match):
+                match_id = future_to_match[future]
                 try:
                     match_details = future.result()
                     batch_details.append(match_details)
+                    successful_match_ids.append(match_id)
                 except Exception as e:
-                    match_id = future_to_match[future]
                     print(f"     Error fetching details for match {match_id}: {e}")
-        
-        # Store batch data (database and/or file)
-        if batch_details:
-            inserted, duplicates, errors = store_matches_data(
-                batch_details, None, output_file, USE_DATABASE
-            )
-            
-            # Mark matches as downloaded
-            successful_match_ids = [match['metadata']['match_id'] for match in batch_details]
-            global_tracker.mark_downloaded(successful_match_ids)
-            global_tracker.save_tracker()
             
-            if USE_DATABASE and DATABASE_AVAILABLE:
-                print(f"     Stored {len(batch_details)} matches: {inserted} inserted, {duplicates} duplicates, {errors} errors")
-            else:
-                print(f"     Saved {len(batch_details)} matches to {output_file}")
+            # Store batch data (database and/or file)
+            if batch_details:
+                inserted, duplicates, errors = store_matches_data(
+                    batch_details, None, output_file, USE_DATABASE
+                )
+                
+                # Mark matches as downloaded
+                global_tracker.mark_downloaded(successful_match_ids)
+                global_tracker.save_tracker()
+                
+                if USE_DATABASE and DATABASE_AVAILABLE:
+                    print(f"     Stored {len(batch_details)} matches: {inserted} inserted, {duplicates} duplicates, {errors} errors")
+                else:
+                    print(f"     Saved {len(batch_details)} matches to {output_file}")
     
     print(f"\n{'='*60}")
     print("DATA COLLECTION COMPLETE")
@@ -1075,8 +1264,8 @@ if __name__ == "__main__":
         print(f"  - {OUTPUT_FILE}: JSONL backup")
     elif not USE_DATABASE and os.path.exists(OUTPUT_FILE):
         print(f"  - {OUTPUT_FILE}: Match data")
-    if os.path.exists('global_matches_downloaded.json'):
-        print("  - global_matches_downloaded.json: Global match tracking (fallback)")
+    if os.path.exists(GLOBAL_TRACKER_FILE):
+        print(f"  - {GLOBAL_TRACKER_FILE}: Global match tracking (fallback)")
     
     print("\nNext steps:")
     if USE_DATABASE and DATABASE_AVAILABLE:
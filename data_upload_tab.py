@@ -3,10 +3,93 @@ Add this to your streamlit_app.py as a new tab for data upload
 """
 
 import streamlit as st
+import csv
+import io
+import itertools
 import json
-import psycopg2
+from psycopg2.extras import execute_values
 from datetime import datetime
 
+from database import get_pooled_conn
+
+try:
+    import orjson
+
+    def _loads(data):
+        return orjson.loads(data)
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    def _loads(data):
+        return json.loads(data)
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj)
+
+# Matches per multi-row INSERT + commit during upload
+UPLOAD_BATCH_SIZE = 500
+
+MATCH_COLUMNS = ('match_id, game_datetime, game_length, game_version, '
+                 'set_core_name, queue_id, tft_set_number, raw_data')
+PARTICIPANT_COLUMNS = ('match_id, puuid, placement, level, last_round, '
+                       'players_eliminated, total_damage_to_players, '
+                       'time_eliminated, companion, traits, units, augments')
+
+
+def _pg_array(values):
+    """Render a list of strings as a Postgres array literal for COPY."""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for v in values)
+    return '{' + ','.join(f'"{v}"' for v in escaped) + '}'
+
+
+def _copy_insert(cursor, table, staging_table, columns, conflict, rows):
+    """
+    Stream rows into a temp staging table with COPY, then merge them into
+    table in one INSERT ... SELECT; returns the number of rows inserted.
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {staging_table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    cursor.execute(f"""
+        INSERT INTO {table} ({columns})
+        SELECT {columns} FROM {staging_table}
+        ON CONFLICT {conflict} DO NOTHING
+    """)
+    inserted = cursor.rowcount
+    cursor.execute(f"TRUNCATE {staging_table}")
+    return inserted
+
+
+def _drop_known_matches(cursor, match_rows, participant_rows):
+    """
+    Drop rows for matches repeated in the batch or already in the database,
+    so the INSERT only carries new data; one ANY() lookup per batch.
+    """
+    cursor.execute("SELECT match_id FROM matches WHERE match_id = ANY(%s)",
+                   (list({row[0] for row in match_rows}),))
+    seen = {row[0] for row in cursor.fetchall()}
+    new_match_rows = []
+    for row in match_rows:
+        if row[0] not in seen:
+            seen.add(row[0])
+            new_match_rows.append(row)
+    new_ids = {row[0] for row in new_match_rows}
+    return new_match_rows, [row for row in participant_rows if row[0] in new_ids]
+
+
+@st.cache_data(ttl=60)
+def _get_table_counts():
+    """Match and participant counts in one round-trip; cached briefly across reruns."""
+    with get_pooled_conn() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT (SELECT COUNT(*) FROM matches), (SELECT COUNT(*) FROM participants)")
+        counts = cursor.fetchone()
+        cursor.close()
+    return counts
+
+
 def create_data_upload_tab():
     """Create a data upload tab for the Streamlit app"""
     
@@ -26,111 +109,163 @@ def create_data_upload_tab():
         
         # Preview first few lines
         if st.checkbox("Preview file content"):
-            file_contents = uploaded_file.read().decode("utf-8")
-            lines = file_contents.split('\n')[:3]  # First 3 lines
+            lines = list(itertools.islice(uploaded_file, 3))  # First 3 lines only
             for i, line in enumerate(lines, 1):
                 if line.strip():
                     try:
-                        data = json.loads(line)
+                        data = _loads(line)
                         st.write(f"Line {i}: Match ID {data['metadata']['match_id']}")
                     except:
                         st.write(f"Line {i}: Invalid JSON")
             uploaded_file.seek(0)  # Reset file pointer
         
+        fast_import = st.checkbox(
+            "Fast import (COPY)",
+            help="Stream each batch through COPY into a staging table; fastest for large files"
+        )
+        
+        single_transaction = st.checkbox(
+            "Fast mode (single transaction)",
+            help="Commit once at the end instead of per batch; a failure rolls back the whole upload"
+        )
+        
         # Upload button
         if st.button("Upload to Database", type="primary"):
             try:
-                # Get database connection
-                database_url = st.secrets["database"]["DATABASE_URL"]
-                conn = psycopg2.connect(database_url)
-                cursor = conn.cursor()
-                
-                # Progress tracking
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                file_contents = uploaded_file.read().decode("utf-8")
-                lines = [line.strip() for line in file_contents.split('\n') if line.strip()]
-                
-                matches_imported = 0
-                participants_imported = 0
-                
-                for line_num, line in enumerate(lines):
-                    try:
-                        match_data = json.loads(line)
-                        
-                        # Extract match info
-                        match_info = match_data['info']
-                        match_id = match_data['metadata']['match_id']
-                        
-                        # Convert timestamp
-                        game_datetime = datetime.fromtimestamp(match_info['game_datetime'] / 1000)
-                        
-                        # Insert match
-                        cursor.execute("""
-                            INSERT INTO matches (
-                                match_id, game_datetime, game_length, game_version,
-                                set_core_name, queue_id, tft_set_number, raw_data
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                            ON CONFLICT (match_id) DO NOTHING
-                        """, (
-                            match_id,
-                            game_datetime,
-                            match_info.get('game_length'),
-                            match_info.get('game_version'),
-                            match_info.get('tft_set_core_name'),
-                            match_info.get('queue_id'),
-                            match_info.get('tft_set_number'),
-                            json.dumps(match_data)
-                        ))
-                        
-                        if cursor.rowcount > 0:
-                            matches_imported += 1
-                        
-                        # Insert participants
-                        for participant in match_info['participants']:
-                            cursor.execute("""
-                                INSERT INTO participants (
-                                    match_id, puuid, placement, level, last_round,
-                                    players_eliminated, total_damage_to_players,
-                                    time_eliminated, companion, traits, units, augments
-                                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                ON CONFLICT (match_id, puuid) DO NOTHING
-                            """, (
+                # Borrow a pooled connection instead of reconnecting per upload
+                with get_pooled_conn() as conn:
+                    cursor = conn.cursor()
+                    
+                    if fast_import:
+                        # Session-local staging tables; pooled connections keep them between uploads
+                        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS matches_staging (LIKE matches INCLUDING DEFAULTS)")
+                        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS participants_staging (LIKE participants INCLUDING DEFAULTS)")
+                        conn.commit()
+                    
+                    if single_transaction:
+                        # One commit for the whole file; reruns are safe thanks to ON CONFLICT
+                        cursor.execute("SET LOCAL synchronous_commit = OFF")
+                    
+                    # Progress tracking
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
+                    
+                    # Stream lines straight off the upload; progress is measured in bytes read
+                    total_bytes = max(uploaded_file.size, 1)
+                    
+                    matches_imported = 0
+                    participants_imported = 0
+                    match_rows = []
+                    participant_rows = []
+                    
+                    def flush_batch():
+                        """Insert the accumulated rows with one statement per table."""
+                        nonlocal matches_imported, participants_imported
+                        if not match_rows:
+                            return
+                        try:
+                            batch_matches, batch_participants = _drop_known_matches(
+                                cursor, match_rows, participant_rows
+                            )
+                            if fast_import:
+                                if batch_matches:
+                                    matches_imported += _copy_insert(
+                                        cursor, 'matches', 'matches_staging', MATCH_COLUMNS,
+                                        '(match_id)', batch_matches
+                                    )
+                                if batch_participants:
+                                    participants_imported += _copy_insert(
+                                        cursor, 'participants', 'participants_staging', PARTICIPANT_COLUMNS,
+                                        '(match_id, puuid)', batch_participants
+                                    )
+                            else:
+                                if batch_matches:
+                                    execute_values(cursor, f"""
+                                        INSERT INTO matches ({MATCH_COLUMNS}) VALUES %s
+                                        ON CONFLICT (match_id) DO NOTHING
+                                    """, batch_matches, page_size=len(batch_matches))
+                                    matches_imported += cursor.rowcount
+                                if batch_participants:
+                                    execute_values(cursor, f"""
+                                        INSERT INTO participants ({PARTICIPANT_COLUMNS}) VALUES %s
+                                        ON CONFLICT (match_id, puuid) DO NOTHING
+                                    """, batch_participants, page_size=len(batch_participants))
+                                    participants_imported += cursor.rowcount
+                            if not single_transaction:
+                                conn.commit()
+                        except Exception as e:
+                            conn.rollback()
+                            if single_transaction:
+                                # Nothing was committed; the outer handler reports the failure
+                                raise
+                            st.error(f"Error inserting {len(match_rows)} matches: {e}")
+                        match_rows.clear()
+                        participant_rows.clear()
+                    
+                    def report_progress(matches_processed):
+                        progress_bar.progress(min(uploaded_file.tell() / total_bytes, 1.0))
+                        status_text.text(f"Processed {matches_processed} matches...")
+                    
+                    line_num = 0
+                    for raw_line in uploaded_file:
+                        line = raw_line.strip()
+                        if not line:
+                            continue
+                        line_num += 1
+                        try:
+                            match_data = _loads(line)
+                            
+                            # Extract match info
+                            match_info = match_data['info']
+                            match_id = match_data['metadata']['match_id']
+                            
+                            # Convert timestamp
+                            game_datetime = datetime.fromtimestamp(match_info['game_datetime'] / 1000)
+                            
+                            match_rows.append((
                                 match_id,
-                                participant['puuid'],
-                                participant.get('placement'),
-                                participant.get('level'),
-                                participant.get('last_round'),
-                                participant.get('players_eliminated'),
-                                participant.get('total_damage_to_players'),
-                                participant.get('time_eliminated'),
-                                json.dumps(participant.get('companion', {})),
-                                json.dumps(participant.get('traits', [])),
-                                json.dumps(participant.get('units', [])),
-                                participant.get('augments', [])
+                                game_datetime,
+                                match_info.get('game_length'),
+                                match_info.get('game_version'),
+                                match_info.get('tft_set_core_name'),
+                                match_info.get('queue_id'),
+                                match_info.get('tft_set_number'),
+                                line.decode('utf-8')  # the line already is the match's JSON
                             ))
                             
-                            if cursor.rowcount > 0:
-                                participants_imported += 1
-                        
-                        # Update progress
-                        progress = (line_num + 1) / len(lines)
-                        progress_bar.progress(progress)
-                        status_text.text(f"Processed {line_num + 1}/{len(lines)} matches...")
+                            for participant in match_info['participants']:
+                                augments = participant.get('augments', [])
+                                participant_rows.append((
+                                    match_id,
+                                    participant['puuid'],
+                                    participant.get('placement'),
+                                    participant.get('level'),
+                                    participant.get('last_round'),
+                                    participant.get('players_eliminated'),
+                                    participant.get('total_damage_to_players'),
+                                    participant.get('time_eliminated'),
+                                    _dumps(participant.get('companion', {})),
+                                    _dumps(participant.get('traits', [])),
+                                    _dumps(participant.get('units', [])),
+                                    _pg_array(augments) if fast_import else augments
+                                ))
+                                
+                        except Exception as e:
+                            st.error(f"Error processing match {line_num}: {e}")
                         
-                        # Commit every 50 matches
-                        if (line_num + 1) % 50 == 0:
-                            conn.commit()
-                            
-                    except Exception as e:
-                        st.error(f"Error processing match {line_num + 1}: {e}")
-                
-                # Final commit
-                conn.commit()
-                cursor.close()
-                conn.close()
+                        # Flush and update progress once per batch instead of per match
+                        if line_num % UPLOAD_BATCH_SIZE == 0:
+                            flush_batch()
+                            report_progress(line_num)
+                    
+                    flush_batch()
+                    report_progress(line_num)
+                    if single_transaction:
+                        conn.commit()
+                    
+                    cursor.close()
                 
+                _get_table_counts.clear()  # show the new totals right away
                 st.success(f"""
                 Upload completed!
                 - New matches imported: {matches_imported}
@@ -143,15 +278,7 @@ def create_data_upload_tab():
     # Database status
     st.subheader("Database Status")
     try:
-        database_url = st.secrets["database"]["DATABASE_URL"]
-        conn = psycopg2.connect(database_url)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM matches")
-        match_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM participants")
-        participant_count = cursor.fetchone()[0]
+        match_count, participant_count = _get_table_counts()
         
         col1, col2 = st.columns(2)
         with col1:
@@ -159,9 +286,6 @@ def create_data_upload_tab():
         with col2:
             st.metric("Total Participants", participant_count)
         
-        cursor.close()
-        conn.close()
-        
     except Exception as e:
         st.error(f"Could not connect to database: {e}")
 
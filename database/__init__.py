@@ -27,6 +27,7 @@ from .connection import (
     DatabaseManager,
     get_db_engine,
     get_db_session,
+    get_pooled_conn,
     get_async_db_engine,
     get_async_db_session,
     test_connection,
@@ -50,6 +51,7 @@ __all__ = [
     "DatabaseManager",
     "get_db_engine", 
     "get_db_session",
+    "get_pooled_conn",
     "get_async_db_engine",
     "get_async_db_session",
     "test_connection",
@@ -9,9 +9,12 @@ This module provides database-optimized clustering operations including:
 - Incremental clustering support
 """
 
+import csv
+import io
 import logging
 import time
-from typing import Dict, List, Any, Optional, Tuple, Set, FrozenSet
+from itertools import islice
+from typing import Dict, List, Any, Iterable, Optional, Tuple, Set, FrozenSet
 from contextlib import contextmanager
 from dataclasses import dataclass
 import json
@@ -114,10 +117,10 @@ class DatabaseClusteringEngine:
                 query_params[f'queue_{i}'] = queue_type
         
         if filters.get('match_game_ids'):
-            match_placeholders = ','.join([f':game_id_{i}' for i in range(len(filters['match_game_ids']))])
-            where_conditions.append(f"m.game_id IN ({match_placeholders})")
-            for i, game_id in enumerate(filters['match_game_ids']):
-                query_params[f'game_id_{i}'] = game_id
+            # One array parameter: incremental runs pass every unclustered match here,
+            # and an IN list with a placeholder per id makes huge statements to parse
+            where_conditions.append("m.game_id = ANY(:match_game_ids)")
+            query_params['match_game_ids'] = list(filters['match_game_ids'])
         
         where_clause = " AND ".join(where_conditions)
         
@@ -315,22 +318,20 @@ class DatabaseClusteringEngine:
         try:
             with self.db_manager.get_session() as session:
                 if match_ids:
-                    # Convert string match_ids to UUIDs for the query
-                    placeholders = ','.join([f':match_id_{i}' for i in range(len(match_ids))])
-                    query = text(f"""
+                    # Game ids go in as one array parameter and resolve to match UUIDs
+                    query = text("""
                     DELETE FROM participant_clusters 
                     WHERE match_id IN (
-                        SELECT match_id FROM matches WHERE game_id IN ({placeholders})
+                        SELECT match_id FROM matches WHERE game_id = ANY(:game_ids)
                     )
                     """)
-                    params = {f'match_id_{i}': match_id for i, match_id in enumerate(match_ids)}
-                    result = session.execute(query, params)
+                    result = session.execute(query, {'game_ids': list(match_ids)})
+                    logger.info(f"Cleared {result.rowcount} existing cluster assignments")
                 else:
-                    query = text("DELETE FROM participant_clusters")
-                    result = session.execute(query)
-                
-                deleted_count = result.rowcount
-                logger.info(f"Cleared {deleted_count} existing cluster assignments")
+                    # Nothing references participant_clusters, so a full clear can
+                    # truncate instead of deleting (and logging) row by row
+                    session.execute(text("TRUNCATE participant_clusters"))
+                    logger.info("Cleared all existing cluster assignments")
                 
         except Exception as e:
             logger.error(f"Error clearing existing clusters: {e}")
@@ -447,6 +448,134 @@ class DatabaseClusteringEngine:
             logger.error(f"Error storing cluster assignments: {e}")
             raise
     
+    def copy_cluster_assignments(self,
+                                 cluster_assignments: Iterable[Dict[str, Any]],
+                                 batch_size: int = 10000) -> int:
+        """
+        Store cluster assignments with COPY into a staging table and two set-based
+        statements, instead of a SELECT plus INSERT/UPDATE round trip per row.
+        
+        Same result as store_cluster_assignments: a participant's latest
+        hierarchical assignment is updated, otherwise a new one is inserted.
+        Consumes any iterable (e.g. a generator) batch by batch, committing each.
+        Unlike store_cluster_assignments there is no per-row error tolerance: one
+        bad row fails its COPY and aborts the run, leaving earlier batches committed.
+        
+        Args:
+            cluster_assignments: Iterable of cluster assignment dictionaries
+            batch_size: Number of records per COPY batch and transaction
+            
+        Returns:
+            Number of assignments stored, one per distinct participant in each batch
+        """
+        update_parameters = json.dumps({
+            'min_sub_cluster_size': 5,
+            'min_main_cluster_size': 3,
+            'similarity_threshold': 0.6
+        })
+        insert_parameters = json.dumps({
+            'min_sub_cluster_size': self.config.min_sub_cluster_size,
+            'min_main_cluster_size': self.config.min_main_cluster_size,
+            'similarity_threshold': self.config.similarity_threshold
+        })
+        
+        total_inserted = 0
+        assignments = iter(cluster_assignments)
+        
+        try:
+            with self.db_manager.get_session() as session:
+                while True:
+                    batch = list(islice(assignments, batch_size))
+                    if not batch:
+                        break
+                    
+                    # One row per participant; later assignments win, as with per-row updates
+                    rows = {}
+                    for assignment in batch:
+                        carry_units_array = list(assignment.get('carry_units', []))
+                        metadata = {
+                            'carry_count': len(carry_units_array),
+                            'similarity_scores': assignment.get('similarity_scores', {}),
+                            'clustering_version': '2.0',
+                            'algorithm': 'hierarchical'
+                        }
+                        rows[assignment['participant_id']] = (
+                            assignment['participant_id'],
+                            assignment.get('match_id'),
+                            assignment.get('puuid', ''),
+                            assignment.get('main_cluster_id', -1),
+                            assignment.get('sub_cluster_id', -1),
+                            _pg_text_array(carry_units_array),
+                            json.dumps(metadata)
+                        )
+                    
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(rows.values())
+                    buffer.seek(0)
+                    
+                    # Each commit may hand the session a different pooled connection,
+                    # so the staging table lives only as long as this batch's transaction
+                    session.execute(text("""
+                        CREATE TEMP TABLE cluster_assignment_staging (
+                            participant_id UUID, match_id UUID, puuid VARCHAR(100),
+                            main_cluster_id INTEGER, sub_cluster_id INTEGER,
+                            carry_units TEXT[], cluster_metadata JSONB
+                        ) ON COMMIT DROP
+                    """))
+                    cursor = session.connection().connection.cursor()
+                    try:
+                        cursor.copy_expert(
+                            "COPY cluster_assignment_staging (participant_id, match_id, puuid, main_cluster_id, "
+                            "sub_cluster_id, carry_units, cluster_metadata) FROM STDIN WITH (FORMAT csv)",
+                            buffer
+                        )
+                    finally:
+                        cursor.close()
+                    
+                    session.execute(text("""
+                        UPDATE participant_clusters pc
+                        SET main_cluster_id = latest.main_cluster_id,
+                            sub_cluster_id = latest.sub_cluster_id,
+                            carry_units = latest.carry_units,
+                            cluster_metadata = latest.cluster_metadata,
+                            parameters = CAST(:parameters AS JSONB),
+                            updated_at = NOW()
+                        FROM (
+                            SELECT DISTINCT ON (existing.participant_id) existing.cluster_id, s.*
+                            FROM cluster_assignment_staging s
+                            JOIN participant_clusters existing
+                              ON existing.participant_id = s.participant_id
+                             AND existing.algorithm = 'hierarchical'
+                            ORDER BY existing.participant_id, existing.cluster_date DESC
+                        ) latest
+                        WHERE pc.cluster_id = latest.cluster_id
+                    """), {'parameters': update_parameters})
+                    
+                    session.execute(text("""
+                        INSERT INTO participant_clusters
+                        (participant_id, algorithm, main_cluster_id, sub_cluster_id,
+                         carry_units, cluster_metadata, parameters, match_id, puuid, created_at)
+                        SELECT s.participant_id, 'hierarchical', s.main_cluster_id, s.sub_cluster_id,
+                               s.carry_units, s.cluster_metadata, CAST(:parameters AS JSONB),
+                               s.match_id, s.puuid, NOW()
+                        FROM cluster_assignment_staging s
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM participant_clusters pc
+                            WHERE pc.participant_id = s.participant_id AND pc.algorithm = 'hierarchical'
+                        )
+                    """), {'parameters': insert_parameters})
+                    
+                    session.commit()
+                    total_inserted += len(rows)
+                    logger.debug(f"Copied batch of {len(rows)} cluster assignments")
+                
+                logger.info(f"Successfully stored {total_inserted} cluster assignments")
+                return total_inserted
+                
+        except Exception as e:
+            logger.error(f"Error copying cluster assignments: {e}")
+            raise
+    
     def calculate_cluster_statistics(self) -> Dict[str, Any]:
         """
         Calculate comprehensive clustering statistics from database.
@@ -707,6 +836,12 @@ class DatabaseClusteringEngine:
 
 
 # Utility functions for common operations
+def _pg_text_array(values: List[str]) -> str:
+    """Postgres text[] literal for COPY, e.g. ['a', 'b'] -> {"a","b"}."""
+    quoted = ('"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"' for value in values)
+    return '{' + ','.join(quoted) + '}'
+
+
 def create_clustering_engine(config: Optional[ClusteringConfig] = None) -> DatabaseClusteringEngine:
     """Create a new database clustering engine with configuration."""
     return DatabaseClusteringEngine(config)
@@ -381,6 +381,25 @@ def get_db_session() -> Generator[sa.orm.Session, None, None]:
         yield session
 
 
+@contextmanager
+def get_pooled_conn():
+    """
+    Borrow a raw psycopg2 connection from the engine's pool.
+    
+    For code that needs the DBAPI directly (execute_values, COPY); the
+    connection is rolled back and returned to the pool on exit, not closed.
+    
+    Usage:
+        with get_pooled_conn() as conn:
+            cursor = conn.cursor()
+    """
+    conn = get_db_engine().raw_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
 @asynccontextmanager
 async def get_async_db_session() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -7,7 +7,7 @@ including batch operations, validation, and transaction management.
 
 import logging
 import time
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Set, Tuple
 from contextlib import contextmanager
 from dataclasses import dataclass
 import json
@@ -21,6 +21,41 @@ from .connection import get_db_session, get_database_manager, retry_on_database_
 
 logger = logging.getLogger(__name__)
 
+# Postgres caps a statement at 65535 bind parameters; stay well under it
+_MAX_BIND_PARAMS = 30000
+
+_MATCH_COLUMNS = ['game_id', 'game_datetime', 'game_length', 'game_version', 'queue_id',
+                  'queue_type', 'game_mode', 'set_core_name', 'set_mutator', 'region']
+_PARTICIPANT_COLUMNS = ['match_id', 'puuid', 'summoner_name', 'summoner_level', 'profile_icon_id',
+                        'placement', 'placement_type', 'level', 'last_round', 'players_eliminated',
+                        'time_eliminated', 'total_damage_to_players', 'gold_left', 'augments',
+                        'companion', 'traits_raw', 'units_raw']
+_UNIT_COLUMNS = ['participant_id', 'character_id', 'unit_name', 'tier', 'rarity',
+                 'chosen', 'items', 'item_names', 'unit_traits']
+_TRAIT_COLUMNS = ['participant_id', 'trait_name', 'current_tier', 'num_units',
+                  'style', 'tier_current', 'tier_total']
+
+
+def _insert_rows(session, table: str, columns: List[str], rows: List[Dict[str, Any]],
+                 suffix: str = '') -> List[Any]:
+    """Insert rows with multi-row VALUES statements; returns any RETURNING rows."""
+    returned = []
+    rows_per_statement = max(1, _MAX_BIND_PARAMS // len(columns))
+    for start in range(0, len(rows), rows_per_statement):
+        params = {}
+        groups = []
+        for i, row in enumerate(rows[start:start + rows_per_statement]):
+            groups.append('(' + ', '.join(f':{col}_{i}' for col in columns) + ')')
+            for col in columns:
+                params[f'{col}_{i}'] = row[col]
+        result = session.execute(
+            text(f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join(groups)} {suffix}"),
+            params
+        )
+        if result.returns_rows:
+            returned.extend(result.fetchall())
+    return returned
+
 
 @dataclass
 class ImportStats:
@@ -188,6 +223,78 @@ class MatchDataImporter:
             self.stats.errors += 1
             return False, f"Error inserting match: {str(e)}"
     
+    def insert_matches_bulk(self, matches_json: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+        """
+        Insert many matches in one transaction with one statement per table.
+        
+        Duplicates are detected by the unique game_id index (ON CONFLICT DO NOTHING)
+        instead of a lookup per match. Not retried: callers fall back to
+        insert_match_data, which isolates and retries individual matches.
+        
+        Args:
+            matches_json: Match data from Riot API
+            
+        Returns:
+            Tuple of (inserted, duplicates, errors)
+        """
+        duplicates = 0
+        errors = 0
+        match_rows = []
+        match_by_game_id = {}
+        for match_json in matches_json:
+            match_data = self._parse_match_data(match_json)
+            if not match_data or not match_data['game_id']:
+                errors += 1
+            elif match_data['game_id'] in match_by_game_id:
+                duplicates += 1
+            else:
+                match_rows.append(match_data)
+                match_by_game_id[match_data['game_id']] = match_json
+        
+        if not match_rows:
+            return 0, duplicates, errors
+        
+        with get_db_session() as session:
+            inserted_matches = _insert_rows(
+                session, 'matches', _MATCH_COLUMNS, match_rows,
+                'ON CONFLICT (game_id) DO NOTHING RETURNING match_id, game_id'
+            )
+            duplicates += len(match_rows) - len(inserted_matches)
+            
+            participant_rows = []
+            for db_match_id, game_id in inserted_matches:
+                participant_rows.extend(self._parse_participants_data(match_by_game_id[game_id], db_match_id))
+            
+            returned = _insert_rows(
+                session, 'participants', _PARTICIPANT_COLUMNS, participant_rows,
+                'RETURNING participant_id, match_id, puuid'
+            )
+            participant_ids = {(str(match_id), puuid): participant_id
+                               for participant_id, match_id, puuid in returned}
+            
+            unit_rows = []
+            trait_rows = []
+            for participant_data in participant_rows:
+                participant_id = participant_ids[(str(participant_data['match_id']), participant_data['puuid'])]
+                for unit_data in participant_data['units_normalized']:
+                    unit_data['participant_id'] = participant_id
+                    unit_rows.append(unit_data)
+                for trait_data in participant_data['traits_normalized']:
+                    trait_data['participant_id'] = participant_id
+                    trait_rows.append(trait_data)
+            
+            _insert_rows(session, 'participant_units', _UNIT_COLUMNS, unit_rows)
+            _insert_rows(session, 'participant_traits', _TRAIT_COLUMNS, trait_rows)
+        
+        self.stats.matches_inserted += len(inserted_matches)
+        self.stats.matches_duplicate += duplicates
+        self.stats.participants_inserted += len(participant_rows)
+        self.stats.units_inserted += len(unit_rows)
+        self.stats.traits_inserted += len(trait_rows)
+        
+        logger.debug(f"Bulk inserted {len(inserted_matches)} matches with {len(participant_rows)} participants")
+        return len(inserted_matches), duplicates, errors
+    
     def _parse_match_data(self, match_json: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Parse match data from API response."""
         try:
@@ -420,6 +527,30 @@ class MatchDataImporter:
             logger.error(f"Error checking match existence: {e}")
             return False
     
+    @retry_on_database_error()
+    def get_existing_match_ids(self, match_ids: List[str]) -> Set[str]:
+        """
+        Return the subset of match_ids already in the database, in one query.
+        
+        Args:
+            match_ids: Game IDs to check
+            
+        Returns:
+            Set of game IDs that exist
+            
+        Raises:
+            ConnectionError: If the database stays unreachable after retries, so
+            callers can fall back instead of treating every id as new
+        """
+        if not match_ids:
+            return set()
+        with get_db_session() as session:
+            rows = session.execute(
+                text("SELECT game_id FROM matches WHERE game_id = ANY(:match_ids)"),
+                {'match_ids': list(match_ids)}
+            ).fetchall()
+            return {row[0] for row in rows}
+    
     @retry_on_database_error()
     def get_match_count(self) -> int:
         """Get total number of matches in database."""
@@ -554,6 +685,12 @@ def check_match_exists(match_id: str) -> bool:
     return importer.check_match_exists(match_id)
 
 
+def get_existing_match_ids(match_ids: List[str]) -> Set[str]:
+    """Return the subset of match_ids that exist in the database."""
+    importer = MatchDataImporter()
+    return importer.get_existing_match_ids(match_ids)
+
+
 def get_database_stats() -> Dict[str, Any]:
     """Get database statistics."""
     importer = MatchDataImporter()
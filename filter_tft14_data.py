@@ -308,7 +308,7 @@ Examples:
             print(f"  Matches kept: {stats['kept_matches']}")
             
             # Update global match tracker if it exists
-            tracker_file = 'global_matches_downloaded.json'
+            tracker_file = 'global_matches_downloaded.txt'
             if os.path.exists(tracker_file):
                 print(f"\nNote: You may want to regenerate {tracker_file} since matches were filtered")
     
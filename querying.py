@@ -33,13 +33,13 @@ try:
     HAS_FILE_SUPPORT = True
 except ImportError:
     # Create a minimal query_jsonl function if clustering module is not available
-    def query_jsonl(filename, filter_func=None):
+    def query_jsonl(filename, filter_func=None, raw_predicates=()):
         """Minimal JSONL query function for when clustering module is unavailable."""
         import json
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
+            with open(filename, 'rb') as f:
                 for line in f:
-                    if line.strip():
+                    if line.strip() and all(predicate(line) for predicate in raw_predicates):
                         match = json.loads(line.strip())
                         if filter_func is None or filter_func(match):
                             yield match
@@ -92,7 +92,8 @@ def load_legacy_clusters(csv_filename='clusters.csv'):
         print(f"Warning: Neither hierarchical nor legacy cluster file found.")
     return clusters
 
-def query_participants(filter_func, jsonl_filename='matches_filtered.jsonl', csv_filename='hierarchical_clusters.csv'):
+def query_participants(filter_func, jsonl_filename='matches_filtered.jsonl', csv_filename='hierarchical_clusters.csv',
+                       raw_predicates=()):
     """
     Query participants from match data with hierarchical cluster information.
     
@@ -100,11 +101,12 @@ def query_participants(filter_func, jsonl_filename='matches_filtered.jsonl', csv
                        cluster_data is dict with 'sub_cluster_id', 'main_cluster_id'
     :param jsonl_filename: Path to the JSONL match data file
     :param csv_filename: Path to the hierarchical clusters CSV file (optional)
+    :param raw_predicates: Checks on each match line's raw bytes; lines failing any are skipped unparsed
     :return: List of matching participants
     """
     clusters = load_clusters(csv_filename) if csv_filename else {}
     results = []
-    for match in query_jsonl(jsonl_filename):
+    for match in query_jsonl(jsonl_filename, raw_predicates=raw_predicates):
         match_id = match['metadata']['match_id']
         for participant in match['info']['participants']:
             puuid = participant['puuid']
@@ -216,6 +218,8 @@ class TFTQueryLegacy:
         self._sub_cluster_id = None
         self._main_cluster_id = None
         self._filters = []
+        # Necessary conditions on a match line's raw bytes, checked before it is parsed
+        self._raw_predicates = []
 
     def set_sub_cluster(self, cluster_id):
         """Filter results to specific sub-cluster only."""
@@ -301,6 +305,13 @@ class TFTQueryLegacy:
         def filter_func(p, c, m):
             return m['info']['game_version'].startswith(f'Version {patch_version}')
         self._filters.append(LogicalFilter(filter_func))
+        
+        # A matching game_version string starts with this text, so lines without it
+        # can be skipped unparsed (only when the text is the same once JSON-encoded)
+        version = f'Version {patch_version}'
+        if version.isascii() and version.isprintable() and '"' not in version and '\\' not in version:
+            needle = b'"' + version.encode()
+            self._raw_predicates.append(lambda raw: needle in raw)
         return self
     
     def add_custom_filter(self, filter_func):
@@ -388,6 +399,9 @@ class TFTQueryLegacy:
             def not_filter(p, c, m):
                 return not all(f(p, c, m) for f in self._filters)
         else:
+            # This query must still match, so its raw-byte checks still apply
+            new_query._raw_predicates = list(self._raw_predicates)
+            
             # This query AND NOT other_query
             def not_filter(p, c, m):
                 # Current query must match
@@ -433,7 +447,8 @@ class TFTQueryLegacy:
 
     def execute(self):
         """Execute the query and return matching participants."""
-        return query_participants(self._combined_filter, self.jsonl_filename, self.csv_filename)
+        return query_participants(self._combined_filter, self.jsonl_filename, self.csv_filename,
+                                  raw_predicates=self._raw_predicates)
 
     def get_stats(self):
         """Execute the query and return statistical summary."""
@@ -931,7 +946,7 @@ class TFTQueryDB:
     def set_patch(self, patch_version: str):
         """Add filter for specific patch version."""
         if not self.use_database:
-            return self._add_legacy_filter(lambda p, c, m: m['info']['game_version'].startswith(f'Version {patch_version}'))
+            return self._convert_to_legacy().set_patch(patch_version)
         
         condition = "m.game_version LIKE :patch_pattern"
         self._filters.append(DatabaseQueryFilter(condition, {"patch_pattern": f"Version {patch_version}%"}))
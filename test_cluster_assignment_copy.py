@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for DatabaseClusteringEngine.copy_cluster_assignments against a
+recording session, without a PostgreSQL server.
+"""
+
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+import database.clustering_operations as clustering_operations
+from database.clustering_operations import DatabaseClusteringEngine
+
+
+class RecordingSession:
+    """Session stand-in logging statements, COPYs and commits in order."""
+
+    def __init__(self):
+        self.events = []
+        self.copied_rows = []
+        cursor = mock.Mock()
+        cursor.copy_expert.side_effect = self._copy
+        self._connection = mock.Mock()
+        self._connection.connection.cursor.return_value = cursor
+
+    def _copy(self, sql, buffer):
+        self.events.append(('copy', sql))
+        self.copied_rows.append(buffer.read().splitlines())
+
+    def execute(self, statement, params=None):
+        self.events.append(('execute', ' '.join(str(statement).split())))
+
+    def connection(self):
+        return self._connection
+
+    def commit(self):
+        self.events.append(('commit', None))
+
+    def transactions(self):
+        """Events grouped by transaction, each ending at a commit."""
+        groups, current = [], []
+        for event in self.events:
+            if event[0] == 'commit':
+                groups.append(current)
+                current = []
+            else:
+                current.append(event)
+        return groups
+
+
+@pytest.fixture
+def session():
+    return RecordingSession()
+
+
+@pytest.fixture
+def engine(session):
+    manager = mock.Mock()
+    manager.get_session = contextmanager(lambda: (yield session))
+    with mock.patch.object(clustering_operations, 'get_database_manager', return_value=manager):
+        yield DatabaseClusteringEngine()
+
+
+def assignment(participant_id, main_cluster_id=0):
+    return {
+        'participant_id': participant_id,
+        'match_id': f'match-{participant_id}',
+        'puuid': f'puuid-{participant_id}',
+        'main_cluster_id': main_cluster_id,
+        'sub_cluster_id': 1,
+        'carry_units': ['TFT_Jinx', 'TFT_Vi'],
+    }
+
+
+def test_staging_table_is_created_in_every_transaction(engine, session):
+    engine.copy_cluster_assignments((assignment(f'p{i}') for i in range(5)), batch_size=2)
+
+    transactions = session.transactions()
+    assert len(transactions) == 3
+    for events in transactions:
+        kind, sql = events[0]
+        assert kind == 'execute'
+        assert sql.startswith('CREATE TEMP TABLE cluster_assignment_staging')
+        assert sql.endswith('ON COMMIT DROP')
+        assert events[1][0] == 'copy'
+    assert not any('TRUNCATE' in (sql or '') for _, sql in session.events)
+
+
+def test_count_is_distinct_participants(engine, session):
+    assignments = [assignment('p1', 0), assignment('p2'), assignment('p1', 7)]
+
+    assert engine.copy_cluster_assignments(assignments) == 2
+
+    # The later assignment of a repeated participant is the one copied
+    rows = session.copied_rows[0]
+    assert len(rows) == 2
+    assert rows[0].startswith('p1,match-p1,puuid-p1,7,')
+
+
+def test_empty_input_opens_no_transaction(engine, session):
+    assert engine.copy_cluster_assignments(iter(())) == 0
+    assert session.events == []
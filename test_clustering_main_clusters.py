@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Deterministic tests for TFTClusteringEngine.create_main_clusters on
+hand-built sub-clusters with known carry distances.
+"""
+
+import sys
+from itertools import combinations
+from pathlib import Path
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import numpy as np
+import pytest
+
+from clustering import (
+    Composition, SubCluster, TFTClusteringEngine, _carry_similarity_matrix, _packed_similarity,
+)
+
+# Sub-clusters in engine order. A and B form one connected component through
+# the close bridge pair A3-B1, but average linkage keeps them apart; C is a
+# component too small for a main cluster and S shares no carry with anyone.
+CARRY_SETS = [
+    ('B2', 'xyz'),
+    ('A1', 'ab'),
+    ('C1', 'pq'),
+    ('S', 'm'),
+    ('B1', 'cdxy'),
+    ('A2', 'abc'),
+    ('C2', 'pqr'),
+    ('B3', 'xyzvw'),
+    ('A3', 'abcd'),
+]
+
+# Distance (1 - carry similarity) for every pair that shares a carry; all
+# other pairs are at distance 1. Within the A/B component no two are equal.
+EXPECTED_DISTANCES = {
+    ('A1', 'A2'): 1 / 30,   # 2 common of 3 -> 2/3 + 0.3
+    ('A1', 'A3'): 0.2,      # 2 common of 4 -> 1/2 + 0.3
+    ('A2', 'A3'): 0.0,      # 3 common of 4 -> capped at 1
+    ('A2', 'B1'): 11 / 15,  # 1 common of 6 -> 1/6 + 0.1
+    ('A3', 'B1'): 11 / 30,  # 2 common of 6 -> 1/3 + 0.3 (the bridge)
+    ('B1', 'B2'): 0.3,      # 2 common of 5 -> 2/5 + 0.3
+    ('B1', 'B3'): 29 / 70,  # 2 common of 7 -> 2/7 + 0.3, not close
+    ('B2', 'B3'): 0.1,      # 3 common of 5 -> 3/5 + 0.3
+    ('C1', 'C2'): 1 / 30,   # 2 common of 3 -> 2/3 + 0.3
+}
+
+
+def build_engine(min_main_cluster_size=3):
+    """Engine holding one single-composition sub-cluster per carry set."""
+    engine = TFTClusteringEngine(min_sub_cluster_size=1, min_main_cluster_size=min_main_cluster_size)
+    for row, (name, units) in enumerate(CARRY_SETS):
+        carries = frozenset(units)
+        comp = Composition(
+            match_id=f'match_{name}', puuid=f'puuid_{name}', riot_id=name,
+            carries=carries, last_round=30, participant_data=None,
+            sub_cluster_id=row, roster_row=row, carries_mask=engine._carry_mask(carries),
+        )
+        engine.compositions.append(comp)
+        engine.sub_clusters.append(SubCluster(
+            id=row, carry_set=carries, compositions=[comp], size=1,
+            avg_placement=4.0, winrate=0.0, top4_rate=100.0, carry_mask=comp.carries_mask,
+        ))
+    engine._sub_cluster_ids = np.arange(len(CARRY_SETS))
+    engine._main_cluster_ids = np.full(len(CARRY_SETS), -1)
+    return engine
+
+
+def main_clusters_by_name(engine):
+    """Main cluster id per sub-cluster name, None when unassigned."""
+    return {
+        name: engine.main_cluster_assignments.get(row)
+        for row, (name, _) in enumerate(CARRY_SETS)
+    }
+
+
+def test_fixture_distances_are_known():
+    engine = build_engine()
+    n_bytes = (len(engine._unit_id) + 7) // 8
+    packed = np.array(
+        [list(sc.carry_mask.to_bytes(n_bytes, 'little')) for sc in engine.sub_clusters],
+        dtype=np.uint8
+    )
+    membership = np.unpackbits(packed, axis=1, bitorder='little').astype(np.float32)
+    distances = 1.0 - _carry_similarity_matrix(membership)
+
+    assert np.allclose(_packed_similarity(packed), 1.0 - distances)
+    for (i, (name1, _)), (j, (name2, _)) in combinations(enumerate(CARRY_SETS), 2):
+        pair = tuple(sorted((name1, name2)))
+        assert distances[i, j] == pytest.approx(EXPECTED_DISTANCES.get(pair, 1.0)), pair
+
+
+def test_linkage_splits_connected_component():
+    engine = build_engine()
+    engine.create_main_clusters()
+
+    clusters = main_clusters_by_name(engine)
+    assert clusters['A1'] == clusters['A2'] == clusters['A3']
+    assert clusters['B1'] == clusters['B2'] == clusters['B3']
+    assert clusters['A1'] != clusters['B1']
+
+
+def test_small_components_stay_unassigned():
+    engine = build_engine()
+    engine.create_main_clusters()
+
+    clusters = main_clusters_by_name(engine)
+    assert clusters['C1'] is None and clusters['C2'] is None
+    assert clusters['S'] is None
+    assert engine.compositions[2].main_cluster_id is None
+    assert engine._main_cluster_ids[[2, 3, 6]].tolist() == [-1, -1, -1]
+
+
+def test_main_ids_follow_first_sub_cluster():
+    engine = build_engine()
+    engine.create_main_clusters()
+
+    # B2 is the first sub-cluster of any main cluster, A1 the next
+    clusters = main_clusters_by_name(engine)
+    assert clusters['B2'] == 0
+    assert clusters['A1'] == 1
+    assert sorted(engine._main_cluster_index) == [0, 1]
+    assert [comp.riot_id for comp in engine._main_cluster_index[0]] == ['B2', 'B1', 'B3']
+    assert [comp.riot_id for comp in engine._main_cluster_index[1]] == ['A1', 'A2', 'A3']
+
+
+def test_min_main_cluster_size_applies_to_linkage_clusters():
+    engine = build_engine(min_main_cluster_size=4)
+    engine.create_main_clusters()
+
+    assert engine.main_cluster_assignments == {}
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the demo API's Content-Encoding negotiation.
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from api._demo_handler import negotiate, parse_accept_encoding
+
+VARIANTS = {None: 'identity', b'gzip': 'gzip', b'br': 'br'}
+
+
+def test_parse_accept_encoding():
+    """q-values default to 1 and are read per coding."""
+    assert parse_accept_encoding(b'gzip, br;q=0.5, *;q=0') == {b'gzip': 1.0, b'br': 0.5, b'*': 0.0}
+
+
+def test_prefers_br_when_equal():
+    """Server preference breaks ties."""
+    assert negotiate(VARIANTS, b'gzip, deflate, br') == 'br'
+
+
+def test_highest_q_wins():
+    """A higher q-value beats server preference."""
+    assert negotiate(VARIANTS, b'br;q=0.5, gzip') == 'gzip'
+
+
+def test_refused_br():
+    """br;q=0 is never served even though it is listed."""
+    assert negotiate(VARIANTS, b'br;q=0, gzip') == 'gzip'
+    assert negotiate(VARIANTS, b'br;q=0') == 'identity'
+
+
+def test_refused_gzip():
+    """gzip;q=0 falls back to identity."""
+    assert negotiate(VARIANTS, b'gzip;q=0') == 'identity'
+
+
+def test_wildcard():
+    """* applies to codings not listed explicitly."""
+    assert negotiate(VARIANTS, b'*') == 'br'
+    assert negotiate(VARIANTS, b'*;q=0') == 'identity'
+    assert negotiate(VARIANTS, b'gzip, *;q=0') == 'gzip'
+    assert negotiate(VARIANTS, b'br;q=0, *') == 'gzip'
+
+
+def test_missing_variant_and_empty_header():
+    """Only precompressed variants are chosen; no header means identity."""
+    assert negotiate({None: 'identity', b'gzip': 'gzip'}, b'br') == 'identity'
+    assert negotiate(VARIANTS, b'') == 'identity'
+
+
+def test_demo_importable_as_package():
+    """api.demo resolves its sibling helper from the repository root."""
+    import api.demo
+    assert api.demo.negotiate is negotiate
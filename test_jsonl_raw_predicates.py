@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the raw-bytes predicates of clustering._query_jsonl and the patch
+filter of TFTQueryLegacy that feeds them.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+import clustering
+from clustering import query_jsonl
+from querying import TFTQueryLegacy
+
+
+def make_match(match_id, game_version, queue_id=1100):
+    return {
+        'metadata': {'match_id': match_id},
+        'info': {
+            'game_version': game_version,
+            'queue_id': queue_id,
+            'participants': [
+                {'puuid': f'{match_id}-{i}', 'placement': i + 1, 'units': []}
+                for i in range(2)
+            ],
+        },
+    }
+
+
+@pytest.fixture
+def parse_count(monkeypatch):
+    """Count the lines _query_jsonl actually parses."""
+    parsed = []
+
+    def counting_loads(line):
+        parsed.append(line)
+        return json.loads(line)
+
+    monkeypatch.setattr(clustering, '_json_loads', counting_loads)
+    return parsed
+
+
+def write_matches(path, matches, separators=(', ', ': ')):
+    path.write_text(''.join(json.dumps(m, separators=separators) + '\n' for m in matches))
+    return str(path)
+
+
+def test_rejected_lines_are_never_parsed(tmp_path, parse_count):
+    filename = write_matches(tmp_path / 'matches.jsonl', [
+        make_match('m1', 'Version 14.1.555'),
+        make_match('m2', 'Version 14.2.555'),
+        make_match('m3', 'Version 14.1.556'),
+    ])
+
+    matches = list(query_jsonl(filename, raw_predicates=[lambda raw: b'Version 14.1' in raw]))
+
+    assert [m['metadata']['match_id'] for m in matches] == ['m1', 'm3']
+    assert len(parse_count) == 2
+
+
+def test_filter_func_still_applies_after_raw_predicates(tmp_path, parse_count):
+    filename = write_matches(tmp_path / 'matches.jsonl', [
+        make_match('m1', 'Version 14.1.555', queue_id=1100),
+        make_match('m2', 'Version 14.1.555', queue_id=1090),
+    ])
+
+    matches = list(query_jsonl(
+        filename,
+        filter_func=lambda m: m['info']['queue_id'] == 1100,
+        raw_predicates=[lambda raw: b'Version 14.1' in raw],
+    ))
+
+    assert [m['metadata']['match_id'] for m in matches] == ['m1']
+
+
+def test_most_selective_predicate_runs_first_after_sampling(tmp_path, monkeypatch, parse_count):
+    monkeypatch.setattr(clustering, '_PREDICATE_SAMPLE_LINES', 4)
+    # Every match is ranked; one in four is on the wanted patch
+    filename = write_matches(tmp_path / 'matches.jsonl', [
+        make_match(f'm{i}', 'Version 14.1.555' if i % 4 == 0 else 'Version 14.2.555')
+        for i in range(12)
+    ])
+    calls = {'ranked': 0, 'patch': 0}
+
+    def ranked(raw):
+        calls['ranked'] += 1
+        return b'"queue_id": 1100' in raw
+
+    def patch(raw):
+        calls['patch'] += 1
+        return b'Version 14.1' in raw
+
+    matches = list(query_jsonl(filename, raw_predicates=[ranked, patch]))
+
+    assert [m['metadata']['match_id'] for m in matches] == ['m0', 'm4', 'm8']
+    # Both run on the 4 sampled lines; afterwards the patch check rejects 6 of
+    # the remaining 8 lines before the ranked check is reached
+    assert calls == {'patch': 12, 'ranked': 4 + 2}
+    assert len(parse_count) == 3
+
+
+def test_set_patch_skips_other_patches_unparsed(tmp_path, parse_count):
+    filename = write_matches(tmp_path / 'matches.jsonl', [
+        make_match('m1', 'Version 14.1.555'),
+        make_match('m2', 'Version 14.2.555'),
+        make_match('m3', 'Version 14.10.555'),
+    ], separators=(',', ':'))
+
+    participants = TFTQueryLegacy(filename, None).set_patch('14.1').execute()
+
+    # 'Version 14.10' also starts with 'Version 14.1', as with the parsed filter alone
+    assert sorted(p['puuid'] for p in participants) == ['m1-0', 'm1-1', 'm3-0', 'm3-1']
+    assert len(parse_count) == 2
+
+
+def test_or_of_patches_does_not_inherit_raw_predicates(tmp_path, parse_count):
+    filename = write_matches(tmp_path / 'matches.jsonl', [
+        make_match('m1', 'Version 14.1.555'),
+        make_match('m2', 'Version 14.2.555'),
+        make_match('m3', 'Version 14.3.555'),
+    ])
+
+    query = TFTQueryLegacy(filename, None).set_patch('14.1').or_(
+        TFTQueryLegacy(filename, None).set_patch('14.2')
+    )
+    participants = query.execute()
+
+    assert sorted({p['puuid'][:2] for p in participants}) == ['m1', 'm2']
+    assert len(parse_count) == 3
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for GlobalMatchTracker.filter_new falling back to the local cache when
+the database lookup fails.
+"""
+
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import database.connection as connection
+import database.data_import as data_import
+from data_collection import GlobalMatchTracker
+from database.data_import import MatchDataImporter
+
+
+def failing_session():
+    raise OperationalError('SELECT 1', {}, Exception('connection refused'))
+
+
+@pytest.fixture
+def db_down(monkeypatch):
+    monkeypatch.setattr(data_import, 'get_db_session', failing_session)
+    monkeypatch.setattr(connection.time, 'sleep', lambda seconds: None)
+
+
+def test_existing_match_ids_raises_when_database_is_down(db_down):
+    with pytest.raises(connection.ConnectionError):
+        MatchDataImporter().get_existing_match_ids(['EUW1_1'])
+
+
+def test_filter_new_falls_back_to_local_cache(db_down, tmp_path):
+    tracker = GlobalMatchTracker(tracker_file=str(tmp_path / 'tracker.txt'), use_database=False)
+    tracker.downloaded_matches = {'EUW1_2'}
+    tracker.use_database = True
+    tracker.db_importer = MatchDataImporter()
+
+    assert tracker.filter_new(['EUW1_1', 'EUW1_2', 'EUW1_3']) == ['EUW1_1', 'EUW1_3']
+
+
+def test_filter_new_uses_database_answer(tmp_path):
+    tracker = GlobalMatchTracker(tracker_file=str(tmp_path / 'tracker.txt'), use_database=False)
+    tracker.use_database = True
+    tracker.db_importer = mock.Mock()
+    tracker.db_importer.get_existing_match_ids.return_value = {'EUW1_3'}
+
+    assert tracker.filter_new(['EUW1_1', 'EUW1_3']) == ['EUW1_1']
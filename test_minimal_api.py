@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Tests for the minimal Flask API's mock routes and cache headers.
+"""
+
+import sys
+from pathlib import Path
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import pytest
+
+from api.minimal import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize('path', [
+    '/api/status',
+    '/api/stats',
+    '/api/clusters/list',
+    '/api/db-status',
+])
+def test_mock_routes_are_cacheable(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=60'
+
+
+def test_unknown_route_is_not_cached(client):
+    response = client.get('/api/clusters')
+    assert response.status_code == 404
+    assert 'Cache-Control' not in response.headers
+
+
+def test_post_is_not_cached(client):
+    response = client.post('/api/upload')
+    assert response.status_code == 200
+    assert 'Cache-Control' not in response.headers
+
+
+def test_each_request_gets_its_own_response(client):
+    first = client.get('/api/status')
+    first.headers['X-Test'] = 'mutated'
+    second = client.get('/api/status')
+    assert second.data == first.data
+    assert 'X-Test' not in second.headers
+    assert second.headers['Content-Type'] == 'text/html; charset=utf-8'
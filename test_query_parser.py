@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the API's query-string interpreter (api/index.py).
+
+Query text from the web form is parsed into a whitelisted method chain and
+replayed; nothing is passed to eval, so anything outside the whitelist must
+be rejected at parse time.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add current directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+import api.index as api_index
+
+
+class RecordingQuery:
+    """Stand-in for TFTQuery that records the calls made on it."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        
+        def record(*args, **kwargs):
+            self.calls.append((method, args, kwargs))
+            return self
+        return record
+
+
+@pytest.fixture
+def recording_query(monkeypatch):
+    monkeypatch.setattr(api_index, 'TFTQuery', RecordingQuery, raising=False)
+
+
+def run(query_text):
+    return api_index._run_query(api_index._parse_query(query_text))
+
+
+def test_chain_replays_in_order(recording_query):
+    result = run("TFTQuery().add_unit('Jinx').add_trait('Sniper', min_tier=2).get_stats()")
+    assert result.calls == [
+        ('add_unit', ('Jinx',), {}),
+        ('add_trait', ('Sniper',), {'min_tier': 2}),
+        ('get_stats', (), {}),
+    ]
+
+
+def test_simple_root_and_literal_arguments(recording_query):
+    result = run("SimpleTFTQuery().add_item_on_unit('Jinx', ['IE', 'LW']).set_patch(None)")
+    assert result.calls == [
+        ('add_item_on_unit', ('Jinx', ['IE', 'LW']), {}),
+        ('set_patch', (None,), {}),
+    ]
+
+
+@pytest.mark.parametrize('combinator', ['or_', 'not_', 'xor'])
+def test_nested_subqueries_replay(recording_query, combinator):
+    result = run(f"TFTQuery().add_unit('Jinx').{combinator}(TFTQuery().add_trait('Sniper').add_player_level(8))")
+    method, (nested,), kwargs = result.calls[1]
+    assert result.calls[0] == ('add_unit', ('Jinx',), {})
+    assert method == combinator and kwargs == {}
+    assert isinstance(nested, RecordingQuery) and nested is not result
+    assert nested.calls == [('add_trait', ('Sniper',), {}), ('add_player_level', (8,), {})]
+
+
+def test_nested_subquery_as_keyword(recording_query):
+    result = run("TFTQuery().or_(other=TFTQuery().add_unit('Vi'))")
+    (method, args, kwargs), = result.calls
+    assert method == 'or_' and args == ()
+    assert kwargs['other'].calls == [('add_unit', ('Vi',), {})]
+
+
+@pytest.mark.parametrize('query_text', [
+    "TFTQuery().add_custom_filter('1=1; DROP TABLE matches')",
+    "TFTQuery().__class__",
+    "TFTQuery().__class__()",
+    "TFTQuery().add_unit('Jinx').__init__()",
+    "__import__('os')",
+    "__import__('os').system('id')",
+    "TFTQuery().add_unit(__import__('os'))",
+    "TFTQuery().or_(__import__('os').system('id'))",
+    "TFTQuery().or_(TFTQuery().add_custom_filter('x'))",
+    "object().add_unit('Jinx')",
+    "TFTQuery('x').add_unit('Jinx')",
+    "TFTQuery",
+    "TFTQuery.add_unit('Jinx')",
+])
+def test_non_whitelisted_calls_rejected(query_text):
+    with pytest.raises(ValueError):
+        api_index._parse_query(query_text)
+
+
+@pytest.mark.parametrize('query_text', [
+    "TFTQuery().add_unit(unit_name)",
+    "TFTQuery().add_unit(lambda: 0)",
+    "TFTQuery().add_unit(name=lambda: 0)",
+    "TFTQuery().add_unit(**{'unit_id': 'Jinx'})",
+    "TFTQuery().add_unit(*['Jinx'])",
+    "TFTQuery().add_unit('Jin' + 'x')",
+    "TFTQuery().add_unit([x for x in 'ab'])",
+])
+def test_non_literal_arguments_rejected(query_text):
+    with pytest.raises(ValueError):
+        api_index._parse_query(query_text)
+
+
+def test_invalid_syntax_rejected():
+    with pytest.raises(SyntaxError):
+        api_index._parse_query("TFTQuery().add_unit(")